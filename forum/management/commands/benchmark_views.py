@@ -0,0 +1,278 @@
+import json
+import math
+import platform
+import random
+import tracemalloc
+from io import StringIO
+from time import perf_counter
+
+import django
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posting.models import Board, Thread
+
+
+# Views that write run last so they do not change the data the others read.
+BENCHMARKED_VIEWS = [
+    "overboard",
+    "board_threads_list",
+    "thread_detail",
+    "ban_list",
+    "create_post",
+    "add_to_observed",
+]
+LATENCY_PERCENTILES = {"p50_ms": 50, "p90_ms": 90, "p99_ms": 99}
+# Query counts do not depend on the machine, so any increase is a regression.
+EXACT_METRICS = ["queries"]
+COMPARED_METRICS = list(LATENCY_PERCENTILES) + EXACT_METRICS + ["peak_memory_kb"]
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[max(math.ceil(len(values) * percent / 100) - 1, 0)]
+
+
+def find_regressions(baseline, results, threshold):
+    regressions = []
+    for size, views in results.items():
+        for view, metrics in views.items():
+            baseline_metrics = baseline.get(size, {}).get(view)
+            if baseline_metrics is None:
+                continue
+            for metric in COMPARED_METRICS:
+                allowed = baseline_metrics[metric]
+                if metric not in EXACT_METRICS:
+                    allowed *= 1 + threshold
+                if metrics[metric] > allowed:
+                    regressions.append(
+                        (size, view, metric, baseline_metrics[metric], metrics[metric])
+                    )
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the main forum views against generated datasets and compare "
+        "the results with a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1000, 10000],
+            help="Number of threads of each generated dataset.",
+        )
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--memory-requests", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument(
+            "--compare", help="Fail on regressions against this JSON baseline."
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed relative increase of latency and memory.",
+        )
+        parser.add_argument(
+            "--use-current-database",
+            action="store_true",
+            help=(
+                "Replace the content of the configured database instead of "
+                "benchmarking against a test database."
+            ),
+        )
+        parser.add_argument(
+            "--noinput",
+            "--no-input",
+            action="store_false",
+            dest="interactive",
+            help="Do not ask before replacing the content of the current database.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as baseline_file:
+                baseline = json.load(baseline_file)["sizes"]
+
+        if options["use_current_database"]:
+            if options["interactive"] and not self.confirm_flush():
+                self.stdout.write("Benchmark cancelled.")
+                return
+            results = self.benchmark_sizes(options)
+        else:
+            old_name = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                results = self.benchmark_sizes(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(
+                    {
+                        "environment": {
+                            "python": platform.python_version(),
+                            "django": django.get_version(),
+                            "database": connection.vendor,
+                        },
+                        "requests": options["requests"],
+                        "seed": options["seed"],
+                        "sizes": results,
+                    },
+                    output,
+                    indent=2,
+                    sort_keys=True,
+                )
+
+        if baseline is None:
+            return
+        regressions = find_regressions(baseline, results, options["threshold"])
+        for size, view, metric, old, new in regressions:
+            self.stderr.write(
+                "Regression: {} threads {} {} {} -> {}".format(
+                    size, view, metric, old, new
+                )
+            )
+        if regressions:
+            raise CommandError(
+                "{} regressions beyond {:.0%}.".format(
+                    len(regressions), options["threshold"]
+                )
+            )
+
+    def confirm_flush(self):
+        answer = input(
+            "This will DELETE ALL DATA in the database {!r} and replace it with "
+            "generated data.\nType 'yes' to continue, or 'no' to cancel: ".format(
+                connection.settings_dict["NAME"]
+            )
+        )
+        return answer == "yes"
+
+    def benchmark_sizes(self, options):
+        results = {}
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for size in options["sizes"]:
+                self.generate_dataset(size, options["seed"])
+                results[str(size)] = self.benchmark_views(size, options)
+        return results
+
+    def generate_dataset(self, size, seed):
+        call_command("flush", interactive=False, verbosity=0)
+        call_command(
+            "generate_forum_data",
+            users=max(size // 10, 10),
+            threads=size,
+            posts=size * 10,
+            bans=max(size // 10, 1),
+            seed=seed,
+            stdout=StringIO(),
+        )
+        self.user = User.objects.create_user("benchmark")
+        self.user.user_permissions.add(
+            Permission.objects.get(content_type__app_label="users", codename="view_ban")
+        )
+        self.boards = list(Board.objects.values_list("slug", flat=True))
+        self.threads = list(Thread.objects.values_list("pk", "board__slug"))
+
+    def benchmark_views(self, size, options):
+        self.rng = random.Random(options["seed"])
+        client = Client()
+        client.force_login(self.user)
+        results = {}
+        for view in BENCHMARKED_VIEWS:
+            cache.clear()
+            results[view] = self.measure(
+                client, getattr(self, "request_{}".format(view)), options
+            )
+            self.stdout.write(
+                "{:>8} {:<20} p50 {p50_ms:>8.2f}ms  p90 {p90_ms:>8.2f}ms  "
+                "p99 {p99_ms:>8.2f}ms  {queries:>3} queries  "
+                "{peak_memory_kb:>8}KB".format(size, view, **results[view])
+            )
+        return results
+
+    def measure(self, client, build_request, options):
+        latencies, queries = [], []
+        for index in range(options["warmup"] + options["requests"]):
+            method, url, data = build_request()
+            with CaptureQueriesContext(connection) as captured:
+                start = perf_counter()
+                response = getattr(client, method)(url, data)
+                latency = perf_counter() - start
+            if response.status_code >= 400:
+                raise CommandError(
+                    "{} {} returned {}.".format(
+                        method.upper(), url, response.status_code
+                    )
+                )
+            if index >= options["warmup"]:
+                latencies.append(latency * 1000)
+                queries.append(len(captured))
+
+        # Tracing allocations slows requests down, so memory is measured
+        # separately from latency.
+        peak_memory = 0
+        for _ in range(options["memory_requests"]):
+            method, url, data = build_request()
+            tracemalloc.start()
+            try:
+                getattr(client, method)(url, data)
+                peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+
+        metrics = {
+            metric: round(percentile(latencies, percent), 2)
+            for metric, percent in LATENCY_PERCENTILES.items()
+        }
+        metrics["queries"] = max(queries)
+        metrics["peak_memory_kb"] = math.ceil(peak_memory / 1024)
+        return metrics
+
+    def random_thread(self):
+        return self.rng.choice(self.threads)
+
+    def request_overboard(self):
+        return "get", reverse("posting:overboard"), {}
+
+    def request_board_threads_list(self):
+        board_slug = self.rng.choice(self.boards)
+        url = reverse("posting:board_threads_list", kwargs={"board_slug": board_slug})
+        return "get", url, {}
+
+    def request_thread_detail(self):
+        pk, board_slug = self.random_thread()
+        url = reverse("posting:thread", kwargs={"board_slug": board_slug, "pk": pk})
+        return "get", url, {}
+
+    def request_ban_list(self):
+        return "get", reverse("users:ban_list"), {}
+
+    def request_create_post(self):
+        pk, board_slug = self.random_thread()
+        url = reverse(
+            "posting:create_post",
+            kwargs={"board_slug": board_slug, "thread_pk": pk},
+        )
+        return "post", url, {"content": "Benchmark reply"}
+
+    def request_add_to_observed(self):
+        pk, _ = self.random_thread()
+        return "post", reverse("users:add_to_observed"), {"id": pk}
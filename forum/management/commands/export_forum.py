@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, OutputWrapper
+from django.core.serializers.json import DjangoJSONEncoder
+
+from forum.management.dump import DUMPED_MODELS
+
+
+class Command(BaseCommand):
+    help = "Stream boards, threads, posts and bans to a JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options["path"] == "-":
+            counts = self.export(self.stdout, options["batch_size"])
+        else:
+            with open(options["path"], "w", encoding="utf-8") as output:
+                counts = self.export(OutputWrapper(output), options["batch_size"])
+
+        self.stderr.write(
+            "Exported {}.".format(
+                ", ".join("{} {}s".format(count, name) for name, count in counts)
+            )
+        )
+
+    def export(self, output, batch_size):
+        counts = []
+        for name, (model, fields) in DUMPED_MODELS.items():
+            rows = (
+                model.objects.order_by("pk")
+                .values(*fields)
+                .iterator(chunk_size=batch_size)
+            )
+            count = 0
+            for row in rows:
+                output.write(
+                    json.dumps({"model": name, "fields": row}, cls=DjangoJSONEncoder)
+                )
+                count += 1
+            counts.append((name, count))
+        return counts
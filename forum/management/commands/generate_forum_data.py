@@ -0,0 +1,262 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from forum.management.dump import reset_sequences, stored_dates_kept
+from posting.models import Board, Post, Thread
+from users.models import Ban, UserProfile
+
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud "
+    "exercitation ullamco laboris nisi aliquip ex ea commodo consequat duis aute "
+    "irure in reprehenderit voluptate velit esse cillum fugiat nulla pariatur"
+).split()
+BAN_DURATIONS = [
+    timedelta(hours=1),
+    timedelta(days=1),
+    timedelta(days=3),
+    timedelta(days=7),
+    timedelta(days=30),
+    timedelta(days=365),
+]
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last_pk=Max("pk"))["last_pk"] or 0) + 1
+
+
+def zipf_cum_weights(size, exponent=1.1):
+    return list(accumulate(1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+class BulkWriter:
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.batches = {}
+        self.counts = {}
+
+    def add(self, obj):
+        model = type(obj)
+        batch = self.batches.setdefault(model, [])
+        batch.append(obj)
+        self.counts[model] = self.counts.get(model, 0) + 1
+        if len(batch) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model):
+        model.objects.bulk_create(self.batches.pop(model, []))
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible forum dataset with skewed activity for "
+        "performance measurements."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--boards", type=int, default=10)
+        parser.add_argument("--threads", type=int, default=10000)
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--bans", type=int, default=100)
+        parser.add_argument("--observed", type=int, default=50)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--password", default="password")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now().replace(microsecond=0)
+        self.start = self.now - timedelta(days=options["days"])
+        self.writer = BulkWriter(options["batch_size"])
+        models = [User, UserProfile, Board, Thread, Post, Ban]
+
+        with transaction.atomic(), stored_dates_kept(models):
+            users = self.generate_users(options["users"], options["password"])
+            boards = self.generate_boards(options["boards"], users)
+            threads = self.generate_threads(
+                options["threads"], options["posts"], boards, users
+            )
+            self.generate_bans(options["bans"], users)
+            self.generate_observed(options["observed"], users, threads)
+            for model in models + [UserProfile.observed_threads.through]:
+                self.writer.flush(model)
+            reset_sequences(models)
+            Thread.objects.rebuild_derived_fields(options["batch_size"])
+        cache.clear()
+
+        counts = self.writer.counts
+        self.stdout.write(
+            "Generated {} users, {} boards, {} threads, {} posts, {} bans and {} "
+            "observed threads.".format(
+                counts.get(User, 0),
+                counts.get(Board, 0),
+                counts.get(Thread, 0),
+                counts.get(Post, 0),
+                counts.get(Ban, 0),
+                counts.get(UserProfile.observed_threads.through, 0),
+            )
+        )
+
+    def random_date(self, after=None):
+        after = after or self.start
+        return after + (self.now - after) * self.rng.random()
+
+    def random_text(self, mean_words):
+        words = max(1, int(self.rng.lognormvariate(0, 0.8) * mean_words))
+        text = " ".join(self.rng.choice(WORDS) for _ in range(words))
+        return text.capitalize()
+
+    def generate_users(self, quantity, password):
+        password = make_password(password)
+        first_pk = next_pk(User)
+        first_profile_pk = next_pk(UserProfile)
+        pks = list(range(first_pk, first_pk + quantity))
+        self.profiles = {}
+        for index, pk in enumerate(pks):
+            self.writer.add(
+                User(
+                    pk=pk,
+                    username="user{}".format(pk),
+                    first_name="User {}".format(pk),
+                    password=password,
+                    date_joined=self.start,
+                )
+            )
+            self.profiles[pk] = first_profile_pk + index
+            self.writer.add(UserProfile(pk=self.profiles[pk], user_id=pk))
+        # A few users write most of the posts.
+        self.rng.shuffle(pks)
+        return pks, zipf_cum_weights(len(pks))
+
+    def pick_user(self, users):
+        pks, cum_weights = users
+        return self.rng.choices(pks, cum_weights=cum_weights)[0]
+
+    def generate_boards(self, quantity, users):
+        first_pk = next_pk(Board)
+        pks = list(range(first_pk, first_pk + quantity))
+        for pk in pks:
+            self.writer.add(
+                Board(
+                    pk=pk,
+                    name="Board {}".format(pk),
+                    slug="board-{}".format(pk),
+                    creator_id=self.pick_user(users),
+                    description=self.random_text(10),
+                    created=self.start.date(),
+                    updated_on=self.start,
+                )
+            )
+        return pks, zipf_cum_weights(len(pks))
+
+    def generate_threads(self, quantity, posts, boards, users):
+        first_pk = next_pk(Thread)
+        next_post_pk = next_pk(Post)
+        # Reply counts follow a power law: most threads get a few replies and a
+        # handful of hot threads get most of them.
+        weights = [self.rng.paretovariate(1.2) for _ in range(quantity)]
+        replies_per_weight = max(posts - quantity, 0) / (sum(weights) or 1)
+        allocated = 0
+        for index, cum_weight in enumerate(accumulate(weights)):
+            pk = first_pk + index
+            created_on = self.start + (self.now - self.start) * (index / quantity)
+            author = self.pick_user(users)
+            board = self.rng.choices(boards[0], cum_weights=boards[1])[0]
+            self.writer.add(
+                Thread(
+                    pk=pk,
+                    board_id=board,
+                    author_id=author,
+                    name=self.random_text(6)[:100],
+                    created_on=created_on,
+                    updated_on=created_on,
+                    last_post_added=created_on,
+                )
+            )
+            replies = round(cum_weight * replies_per_weight) - allocated
+            allocated += replies
+            next_post_pk = self.generate_posts(
+                pk, next_post_pk, author, created_on, replies, users
+            )
+        return list(range(first_pk, first_pk + quantity)), zipf_cum_weights(quantity)
+
+    def generate_posts(self, thread, pk, author, created_on, replies, users):
+        self.add_post(pk, thread, author, created_on, starting_post=True)
+        mean_gap = (self.now - created_on) / (replies + 1)
+        thread_posts = []
+        for _ in range(replies):
+            pk += 1
+            created_on = min(
+                created_on + mean_gap * self.rng.expovariate(1), self.now
+            )
+            parent = refers_to = None
+            if thread_posts and self.rng.random() < 0.6:
+                # Answer a recent reply; chains of answers make deep trees.
+                answered = int(self.rng.expovariate(0.5)) + 1
+                refers_to, root = thread_posts[-min(answered, len(thread_posts))]
+                parent = root or refers_to
+            self.add_post(
+                pk,
+                thread,
+                self.pick_user(users),
+                created_on,
+                parent=parent,
+                refers_to=refers_to,
+            )
+            thread_posts.append((pk, parent))
+        return pk + 1
+
+    def add_post(self, pk, thread, author, created_on, **kwargs):
+        updated = self.rng.random() < 0.05
+        post = Post(
+            pk=pk,
+            thread_id=thread,
+            author_id=author,
+            content=self.random_text(40),
+            created_on=created_on,
+            updated=updated,
+            updated_on=self.random_date(created_on) if updated else created_on,
+            starting_post=kwargs.get("starting_post", False),
+            parent_id=kwargs.get("parent"),
+            refers_to_id=kwargs.get("refers_to"),
+        )
+        post.render_content_html()
+        self.writer.add(post)
+
+    def generate_bans(self, quantity, users):
+        first_pk = next_pk(Ban)
+        for pk in range(first_pk, first_pk + quantity):
+            created = self.random_date()
+            duration = self.rng.choice(BAN_DURATIONS)
+            self.writer.add(
+                Ban(
+                    pk=pk,
+                    user_id=self.pick_user(users),
+                    reason=self.random_text(5)[:150],
+                    created=created,
+                    duration=duration,
+                    expires_at=created + duration,
+                )
+            )
+
+    def generate_observed(self, maximum, users, threads):
+        Observed = UserProfile.observed_threads.through
+        for user in users[0]:
+            quantity = min(int(self.rng.paretovariate(1.5)) - 1, maximum)
+            observed = self.rng.choices(threads[0], cum_weights=threads[1], k=quantity)
+            for thread in sorted(set(observed)):
+                self.writer.add(
+                    Observed(userprofile_id=self.profiles[user], thread_id=thread)
+                )
@@ -0,0 +1,95 @@
+import json
+import sys
+from functools import partial
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from forum.management.dump import DUMPED_MODELS, reset_sequences, stored_dates_kept
+from posting.models import Post, Thread, invalidate_boards_list
+from users.models import active_ban_cache_key
+
+
+class Command(BaseCommand):
+    help = (
+        "Load boards, threads, posts and bans from a JSON Lines file and rebuild "
+        "the derived thread fields."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options["path"] == "-":
+            counts = self.load(sys.stdin, options["batch_size"])
+        else:
+            with open(options["path"], encoding="utf-8") as lines:
+                counts = self.load(lines, options["batch_size"])
+
+        self.stdout.write(
+            "Imported {}.".format(
+                ", ".join(
+                    "{} {}s".format(counts[name], name) for name in DUMPED_MODELS
+                )
+            )
+        )
+
+    def build(self, name, fields):
+        model, field_names = DUMPED_MODELS[name]
+        obj = model(
+            **{
+                field: model._meta.get_field(field).to_python(fields[field])
+                for field in field_names
+            }
+        )
+        if model is Thread:
+            obj.last_post_added = obj.created_on
+        elif model is Post:
+            obj.render_content_html()
+        return obj
+
+    def flush(self, name, batch):
+        model = DUMPED_MODELS[name][0]
+        # bulk_create sends no signals, so nothing touches threads per post.
+        model.objects.bulk_create(batch)
+        if name == "ban":
+            keys = {active_ban_cache_key(ban.user_id) for ban in batch}
+            transaction.on_commit(partial(cache.delete_many, keys))
+        batch.clear()
+
+    def load(self, lines, batch_size):
+        models = [model for model, fields in DUMPED_MODELS.values()]
+        batches = {name: [] for name in DUMPED_MODELS}
+        counts = dict.fromkeys(DUMPED_MODELS, 0)
+
+        with transaction.atomic(), stored_dates_kept(models):
+            for number, line in enumerate(lines, start=1):
+                try:
+                    record = json.loads(line)
+                    obj = self.build(record["model"], record["fields"])
+                except (
+                    FieldDoesNotExist,
+                    KeyError,
+                    ValidationError,
+                    ValueError,
+                ) as error:
+                    raise CommandError("Line {}: {!r}".format(number, error))
+
+                batch = batches[record["model"]]
+                batch.append(obj)
+                counts[record["model"]] += 1
+                if len(batch) >= batch_size:
+                    self.flush(record["model"], batch)
+
+            for name, batch in batches.items():
+                self.flush(name, batch)
+
+            reset_sequences(models)
+
+            Thread.objects.rebuild_derived_fields(batch_size)
+
+        invalidate_boards_list()
+        return counts
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import connection
+
+from posting.models import Board, Post, Thread
+from users.models import Ban
+
+
+# Dumped models in dependency order with their stored fields. Derived fields
+# (thread counters, starting post, excerpts and rendered post HTML) are rebuilt
+# on import.
+DUMPED_MODELS = {
+    "board": (
+        Board,
+        ["id", "name", "slug", "description", "creator_id", "created", "updated_on"],
+    ),
+    "thread": (
+        Thread,
+        ["id", "board_id", "author_id", "name", "closed", "created_on", "updated_on"],
+    ),
+    "post": (
+        Post,
+        [
+            "id",
+            "thread_id",
+            "author_id",
+            "parent_id",
+            "refers_to_id",
+            "content",
+            "file",
+            "hidden",
+            "updated",
+            "starting_post",
+            "created_on",
+            "updated_on",
+        ],
+    ),
+    "ban": (Ban, ["id", "user_id", "reason", "created", "duration", "expires_at"]),
+}
+
+
+@contextmanager
+def stored_dates_kept(models):
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def reset_sequences(models):
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
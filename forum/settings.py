@@ -91,6 +91,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -137,5 +150,15 @@ DEFAULT_AVATAR_URL = os.path.join(MEDIA_URL, "default_avatar.png")
 MODERATOR_GROUP_NAME = "Moderator"
 LOGOUT_REDIRECT_URL = "users:login"
 AUTH_PROFILE_MODULE = "users.UserProfile"
+# Thread bodies are keyed by thread changes; the timeout only bounds how long
+# edited author names and avatars can stay stale.
+THREAD_BODY_CACHE_TIMEOUT = 60 * 60
+# Ban signals clear cached ban states; the timeout bounds how long a user stays
+# unbanned after a ban written without signals or by another process.
+NOT_BANNED_CACHE_TIMEOUT = 5 * 60
+# Board signals replace the boards list version; the timeout bounds how long
+# processes that do not share the cache, like with the default LocMemCache, keep
+# showing a list changed by another process.
+BOARDS_LIST_CACHE_TIMEOUT = 5 * 60
 # !IMPORTANT! Remove on production.
 AUTH_PASSWORD_VALIDATORS = []
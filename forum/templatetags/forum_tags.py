@@ -1,18 +1,56 @@
+from uuid import uuid4
+
 from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 
-from posting.models import Board
+from posting.models import BOARDS_LIST_VERSION_CACHE_KEY, Board
 
 
 register = template.Library()
 
+# (version, boards, rendered navigation) shared by every request of the process.
+_boards_cache = (None, [], "")
+
+
+def get_boards_list_version():
+    version = cache.get(BOARDS_LIST_VERSION_CACHE_KEY)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(
+            BOARDS_LIST_VERSION_CACHE_KEY, version, settings.BOARDS_LIST_CACHE_TIMEOUT
+        ):
+            version = cache.get(BOARDS_LIST_VERSION_CACHE_KEY, version)
+    return version
+
+
+def get_cached_boards():
+    global _boards_cache
+
+    version = get_boards_list_version()
+    if _boards_cache[0] != version:
+        boards_cache_key = "boards-list:{}".format(version)
+        boards = cache.get(boards_cache_key)
+        if boards is None:
+            boards = list(Board.objects.all().order_by("name"))
+            cache.set(boards_cache_key, boards, settings.BOARDS_LIST_CACHE_TIMEOUT)
+        navigation = render_to_string("forum/_boards_nav.html", {"boards": boards})
+        _boards_cache = (version, boards, navigation)
+    return _boards_cache
+
 
 @register.simple_tag
 def boards_list():
-    return list(Board.objects.all().order_by("name"))
+    return list(get_cached_boards()[1])
+
+
+@register.simple_tag
+def boards_nav():
+    return mark_safe(get_cached_boards()[2])
 
 
 @register.simple_tag
 def item_or_parent_id(item):
-    if item.parent:
-        return item.parent.id
-    return item.id
+    return item.parent_id or item.id
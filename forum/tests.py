@@ -1,9 +1,20 @@
+import json
 import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
+from freezegun import freeze_time
 
-from posting.models import Board
-from forum.templatetags.forum_tags import boards_list
+from posting.models import Board, Post, Thread
+from forum.templatetags.forum_tags import boards_list, boards_nav
+from users.models import Ban
 
 
 def get_test_image_path():
@@ -11,6 +22,202 @@ def get_test_image_path():
 
 
 class TemplateTagsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username="testuser01")
+
     def test_boards_list(self):
         boards = list(Board.objects.all())
         self.assertListEqual(boards, boards_list())
+
+    def test_boards_list_cached_until_boards_change(self):
+        board = Board.objects.create(creator=self.user, name="testboard")
+        self.assertListEqual([board], boards_list())
+
+        with self.assertNumQueries(0):
+            self.assertListEqual([board], boards_list())
+            self.assertIn(board.name, boards_nav())
+
+        other_board = Board.objects.create(creator=self.user, name="anotherboard")
+        self.assertListEqual([other_board, board], boards_list())
+
+        board.delete()
+        self.assertListEqual([other_board], boards_list())
+        self.assertNotIn("testboard", boards_nav())
+
+    def test_boards_list_cache_expires(self):
+        with freeze_time("2012-01-14 03:00:00") as frozen_time:
+            board = Board.objects.create(creator=self.user, name="testboard")
+            self.assertListEqual([board], boards_list())
+            Board.objects.filter(pk=board.pk).update(name="renamedboard")
+
+            self.assertEqual("testboard", boards_list()[0].name)
+            frozen_time.tick(timedelta(seconds=settings.BOARDS_LIST_CACHE_TIMEOUT + 1))
+            self.assertEqual("renamedboard", boards_list()[0].name)
+
+
+class ForumDumpTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username="testuser01")
+        with freeze_time("2012-01-14 03:00:00"):
+            self.board = Board.objects.create(creator=self.user, name="testboard")
+            self.thread = Thread.objects.create(
+                author=self.user, board=self.board, name="test thread"
+            )
+            self.starting_post = Post.objects.create(
+                author=self.user,
+                thread=self.thread,
+                content="lorem\nipsum",
+                starting_post=True,
+            )
+        with freeze_time("2012-01-14 04:00:00"):
+            self.reply = Post.objects.create(
+                author=self.user,
+                thread=self.thread,
+                content="reply",
+                parent=self.starting_post,
+                refers_to=self.starting_post,
+            )
+            self.ban = Ban.objects.create(
+                user=self.user, reason="test", duration=timedelta(days=2)
+            )
+
+    def test_export_and_import_round_trip(self):
+        self.assertFalse(self.user.userprofile.is_banned)
+        self.thread.refresh_from_db()
+        thread_values = Thread.objects.values().get()
+        post_values = list(Post.objects.order_by("pk").values())
+        ban_values = Ban.objects.values().get()
+        board_values = Board.objects.values().get()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "forum.jsonl")
+            call_command("export_forum", path, stderr=StringIO())
+            Board.objects.all().delete()
+            Ban.objects.all().delete()
+            out = StringIO()
+            with self.assertNumQueries(10):
+                call_command("import_forum", path, stdout=out)
+
+        self.assertEqual(
+            out.getvalue(), "Imported 1 boards, 1 threads, 2 posts, 1 bans.\n"
+        )
+        self.assertEqual(Board.objects.values().get(), board_values)
+        self.assertEqual(Thread.objects.values().get(), thread_values)
+        self.assertEqual(list(Post.objects.order_by("pk").values()), post_values)
+        self.assertEqual(Ban.objects.values().get(), ban_values)
+
+    def test_export_to_stdout(self):
+        out = StringIO()
+
+        call_command("export_forum", stdout=out, stderr=StringIO())
+
+        self.assertEqual(
+            [line.split(",")[0] for line in out.getvalue().splitlines()],
+            [
+                '{"model": "board"',
+                '{"model": "thread"',
+                '{"model": "post"',
+                '{"model": "post"',
+                '{"model": "ban"',
+            ],
+        )
+
+
+class GenerateForumDataTestCase(TestCase):
+    options = {
+        "users": 20,
+        "boards": 3,
+        "threads": 30,
+        "posts": 300,
+        "bans": 10,
+        "seed": 7,
+        "batch_size": 50,
+    }
+
+    def generate(self):
+        with freeze_time("2012-01-14 03:00:00"):
+            call_command("generate_forum_data", stdout=StringIO(), **self.options)
+        return list(
+            Post.objects.order_by("pk").values_list(
+                "thread__board__name", "author__username", "content", "created_on"
+            )
+        )
+
+    def test_generated_volumes_and_derived_fields(self):
+        self.generate()
+
+        self.assertEqual(get_user_model().objects.count(), 20)
+        self.assertEqual(Board.objects.count(), 3)
+        self.assertEqual(Thread.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Ban.objects.count(), 10)
+        self.assertFalse(Thread.objects.filter(starting_post__isnull=True).exists())
+        self.assertEqual(
+            sum(Thread.objects.values_list("post_count", flat=True)), 300 - 30
+        )
+        self.assertTrue(Post.objects.filter(parent__isnull=False).exists())
+        self.assertEqual(
+            get_user_model().objects.filter(userprofile__isnull=True).count(), 0
+        )
+
+    def test_same_seed_generates_same_data(self):
+        first = self.generate()
+        get_user_model().objects.all().delete()
+
+        self.assertEqual(self.generate(), first)
+
+
+class BenchmarkViewsTestCase(TestCase):
+    options = {
+        "sizes": [20],
+        "requests": 2,
+        "warmup": 0,
+        "memory_requests": 1,
+        "use_current_database": True,
+        "interactive": False,
+        "stdout": StringIO(),
+    }
+
+    def test_results_written_and_compared(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            call_command("benchmark_views", output=path, **self.options)
+            with open(path) as baseline_file:
+                baseline = json.load(baseline_file)
+
+            self.assertEqual(
+                set(baseline["sizes"]["20"]),
+                {
+                    "overboard",
+                    "board_threads_list",
+                    "thread_detail",
+                    "ban_list",
+                    "create_post",
+                    "add_to_observed",
+                },
+            )
+            for metrics in baseline["sizes"]["20"].values():
+                self.assertEqual(
+                    set(metrics),
+                    {"p50_ms", "p90_ms", "p99_ms", "queries", "peak_memory_kb"},
+                )
+                self.assertGreater(metrics["queries"], 0)
+
+            for metrics in baseline["sizes"]["20"].values():
+                metrics.update(p50_ms=1000, p90_ms=1000, p99_ms=1000)
+                metrics["peak_memory_kb"] *= 100
+            with open(path, "w") as baseline_file:
+                json.dump(baseline, baseline_file)
+            call_command("benchmark_views", compare=path, **self.options)
+
+            baseline["sizes"]["20"]["overboard"]["queries"] -= 1
+            with open(path, "w") as baseline_file:
+                json.dump(baseline, baseline_file)
+            stderr = StringIO()
+            with self.assertRaisesMessage(CommandError, "1 regressions beyond 20%."):
+                call_command(
+                    "benchmark_views", compare=path, stderr=stderr, **self.options
+                )
+            self.assertIn("20 threads overboard queries", stderr.getvalue())
@@ -1,5 +1,9 @@
+from hashlib import md5
+
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.views.generic.base import RedirectView
 
 
@@ -8,5 +12,29 @@ class BaseViewMixin(LoginRequiredMixin):
     redirect_field_name = "redirect_to"
 
 
+class ConditionalGetViewMixin:
+    def get_validators(self):
+        return None, None
+
+    def get(self, request, *args, **kwargs):
+        etag_parts, last_modified = self.get_validators()
+        if etag_parts is None:
+            return super().get(request, *args, **kwargs)
+
+        etag_parts = list(etag_parts) + [request.user.pk]
+        etag = quote_etag(md5(repr(etag_parts).encode()).hexdigest())
+        last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
 class IndexRedirectView(BaseViewMixin, RedirectView):
     url = reverse_lazy("posting:overboard")
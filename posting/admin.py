@@ -1,18 +1,45 @@
 from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.http import urlencode
 
 from posting.models import Board, Post, Thread
 
 
-class PostInline(admin.TabularInline):
-    model = Post
+class BoardAdmin(admin.ModelAdmin):
+    list_display = ["name", "creator", "created", "updated_on"]
+    list_select_related = ["creator"]
+    autocomplete_fields = ["creator"]
+    prepopulated_fields = {"slug": ["name"]}
+    search_fields = ["^name"]
 
 
 class ThreadAdmin(admin.ModelAdmin):
-    inlines = [
-        PostInline,
-    ]
+    list_display = ["name", "board", "author", "post_count", "last_post_added"]
+    list_select_related = ["board", "author"]
+    list_filter = ["board"]
+    autocomplete_fields = ["author", "board"]
+    raw_id_fields = ["starting_post"]
+    readonly_fields = ["posts", "post_count", "last_post_added"]
+    show_full_result_count = False
 
+    def posts(self, obj):
+        url = "{}?{}".format(
+            reverse("admin:posting_post_changelist"),
+            urlencode({"thread__id__exact": obj.pk}),
+        )
+        return format_html('<a href="{}">{} replies</a>', url, obj.post_count)
 
-admin.site.register(Board)
-admin.site.register(Post)
+
+class PostAdmin(admin.ModelAdmin):
+    list_display = ["id", "thread", "author", "starting_post", "created_on"]
+    list_select_related = ["thread", "author"]
+    list_filter = ["starting_post"]
+    autocomplete_fields = ["author"]
+    raw_id_fields = ["thread", "parent", "refers_to"]
+    show_full_result_count = False
+
+
+admin.site.register(Board, BoardAdmin)
+admin.site.register(Post, PostAdmin)
 admin.site.register(Thread, ThreadAdmin)
@@ -1,9 +1,15 @@
+from django import forms
 from django.forms import ModelForm
 
 from posting.models import Post
 
 
 class PostForm(ModelForm):
+    reply_fields = ["parent", "refers_to"]
+
+    parent = forms.IntegerField(required=False, widget=forms.HiddenInput)
+    refers_to = forms.IntegerField(required=False, widget=forms.HiddenInput)
+
     def __init__(self, *args, **kwargs):
         self.thread = kwargs.pop("thread", None)
         self.author = kwargs.pop("author", None)
@@ -11,11 +17,34 @@ class PostForm(ModelForm):
 
     class Meta:
         model = Post
-        fields = ["content", "parent", "refers_to", "file"]
+        fields = ["content", "file"]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        post_ids = {
+            cleaned_data[field]
+            for field in self.reply_fields
+            if cleaned_data.get(field) is not None
+        }
+        if not post_ids:
+            return cleaned_data
+
+        posts = Post.objects.filter(thread=self.thread).in_bulk(post_ids)
+        for field in self.reply_fields:
+            if cleaned_data.get(field) is None:
+                continue
+            try:
+                cleaned_data[field] = posts[cleaned_data[field]]
+            except KeyError:
+                self.add_error(field, "Select a post from this thread.")
+        return cleaned_data
 
     def save(self):
         post = super().save(commit=False)
         post.thread = self.thread
         post.author = self.author
+        for field in self.reply_fields:
+            if self.cleaned_data.get(field) is not None:
+                setattr(post, field, self.cleaned_data[field])
         post.save()
         return post
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posting.models import Thread
+
+
+class Command(BaseCommand):
+    help = "Recalculate the stored reply counter of every thread."
+
+    def handle(self, *args, **options):
+        updated = Thread.objects.rebuild_post_counts()
+        self.stdout.write("Rebuilt post count of {} threads.".format(updated))
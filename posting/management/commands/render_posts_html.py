@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posting.models import CONTENT_HTML_VERSION, Post
+
+
+class Command(BaseCommand):
+    help = "Store the rendered HTML of posts rendered with outdated rules."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        posts = Post.objects.exclude(content_html_version=CONTENT_HTML_VERSION)
+        rendered = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("pk", "content")[:batch_size]
+            )
+            if not batch:
+                break
+            for post in batch:
+                post.render_content_html()
+            Post.objects.bulk_update(
+                batch, ["content_html", "content_html_version"], batch_size=batch_size
+            )
+            rendered += len(batch)
+            last_pk = batch[-1].pk
+
+        self.stdout.write("Rendered HTML of {} posts.".format(rendered))
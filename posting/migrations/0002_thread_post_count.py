@@ -0,0 +1,34 @@
+# Generated by Django 3.0.7 on 2026-10-18 08:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_post_count(apps, schema_editor):
+    Thread = apps.get_model("posting", "Thread")
+    Post = apps.get_model("posting", "Post")
+    replies = (
+        Post.objects.filter(thread=OuterRef("pk"), starting_post=False)
+        .order_by()
+        .values("thread")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Thread.objects.update(post_count=Coalesce(Subquery(replies), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_post_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.0.7 on 2026-10-18 08:43
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def populate_starting_post(apps, schema_editor):
+    Thread = apps.get_model("posting", "Thread")
+    Post = apps.get_model("posting", "Post")
+    starting_posts = Post.objects.filter(
+        thread=OuterRef("pk"), starting_post=True
+    ).values("pk")[:1]
+    Thread.objects.update(starting_post=Subquery(starting_posts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0002_thread_post_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='starting_post',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='started_thread', to='posting.Post'),
+        ),
+        migrations.RunPython(populate_starting_post, migrations.RunPython.noop),
+    ]
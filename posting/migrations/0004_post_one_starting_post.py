@@ -0,0 +1,17 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0003_thread_starting_post'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='post',
+            constraint=models.UniqueConstraint(condition=models.Q(starting_post=True), fields=('thread',), name='posting_post_one_starting_post'),
+        ),
+    ]
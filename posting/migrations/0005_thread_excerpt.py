@@ -0,0 +1,43 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:02
+
+from django.db import migrations, models
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+
+BATCH_SIZE = 1000
+
+
+def populate_excerpt(apps, schema_editor):
+    Thread = apps.get_model("posting", "Thread")
+    threads = (
+        Thread.objects.filter(starting_post__isnull=False)
+        .order_by("pk")
+        .values_list("pk", "starting_post__content")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    # Excerpts are written a batch per query rather than a thread per query.
+    batch = []
+    for pk, content in threads:
+        excerpt = linebreaks(Truncator(content).chars(220), autoescape=True)
+        batch.append(Thread(pk=pk, excerpt=excerpt))
+        if len(batch) >= BATCH_SIZE:
+            Thread.objects.bulk_update(batch, ["excerpt"], batch_size=BATCH_SIZE)
+            batch = []
+    Thread.objects.bulk_update(batch, ["excerpt"], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0004_post_one_starting_post'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='excerpt',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(populate_excerpt, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0006_post_content_html'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['thread', 'created_on', 'id'], name='posting_pos_thread__cc3c43_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['board', 'last_post_added', 'id'], name='posting_thr_board_i_f85aae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['last_post_added', 'id'], name='posting_thr_last_po_1902b2_idx'),
+        ),
+    ]
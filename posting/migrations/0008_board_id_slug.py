@@ -0,0 +1,38 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posting', '0007_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewBoard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateField(auto_now_add=True)),
+                ('description', models.CharField(blank=True, max_length=500)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('slug', models.SlugField(allow_unicode=True, max_length=100, unique=True)),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='new_board',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='posting.NewBoard'),
+        ),
+        migrations.AlterField(
+            model_name='thread',
+            name='board',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='posting.Board'),
+        ),
+    ]
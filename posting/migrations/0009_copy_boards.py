@@ -0,0 +1,104 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:20
+
+from django.core.cache import cache
+from django.db import migrations, transaction
+from django.utils.text import slugify
+
+
+BATCH_SIZE = 1000
+
+
+def unique_slug(name, taken):
+    base_slug = slugify(name, allow_unicode=True)[:90] or "board"
+    slug = base_slug
+    suffix = 2
+    while slug in taken:
+        slug = "{}-{}".format(base_slug, suffix)
+        suffix += 1
+    taken.add(slug)
+    return slug
+
+
+def move_threads(Thread, old_field, new_field, old_value, new_value):
+    # Each batch commits on its own, so a big board does not hold its threads
+    # locked until the whole board is moved. Batches start after the last moved
+    # thread, so they do not rescan the threads moved before them.
+    last_pk = None
+    while True:
+        threads = Thread.objects.filter(**{old_field: old_value, new_field: None})
+        if last_pk is not None:
+            threads = threads.filter(pk__gt=last_pk)
+        with transaction.atomic():
+            batch = list(
+                threads.order_by("pk").values_list("pk", flat=True)[:BATCH_SIZE]
+            )
+            if not batch:
+                return
+            Thread.objects.filter(pk__in=batch).update(**{new_field: new_value})
+        last_pk = batch[-1]
+
+
+def copy_boards_to_integer_ids(apps, schema_editor):
+    OldBoard = apps.get_model("posting", "Board")
+    NewBoard = apps.get_model("posting", "NewBoard")
+    Thread = apps.get_model("posting", "Thread")
+    old_boards = list(OldBoard.objects.order_by("created", "name"))
+    # Boards whose name is already a slug keep it, so old URLs with their name
+    # keep leading to them rather than to a board with a colliding slug.
+    slug_names = {
+        board.name
+        for board in old_boards
+        if slugify(board.name, allow_unicode=True) == board.name
+    }
+    taken = slug_names | set(NewBoard.objects.values_list("slug", flat=True))
+    for old_board in old_boards:
+        # Boards copied by an interrupted run are reused.
+        new_board = NewBoard.objects.filter(name=old_board.name).first()
+        if new_board is None:
+            if old_board.name in slug_names:
+                slug = old_board.name
+            else:
+                slug = unique_slug(old_board.name, taken)
+            with transaction.atomic():
+                new_board = NewBoard.objects.create(
+                    creator_id=old_board.creator_id,
+                    description=old_board.description,
+                    name=old_board.name,
+                    slug=slug,
+                )
+                NewBoard.objects.filter(pk=new_board.pk).update(
+                    created=old_board.created, updated_on=old_board.updated_on
+                )
+        move_threads(Thread, "board", "new_board", old_board.pk, new_board.pk)
+    cache.delete("boards-list-version")
+
+
+def copy_boards_to_name_keys(apps, schema_editor):
+    OldBoard = apps.get_model("posting", "Board")
+    NewBoard = apps.get_model("posting", "NewBoard")
+    Thread = apps.get_model("posting", "Thread")
+    for new_board in NewBoard.objects.order_by("pk"):
+        if not OldBoard.objects.filter(pk=new_board.name).exists():
+            with transaction.atomic():
+                OldBoard.objects.create(
+                    creator_id=new_board.creator_id,
+                    description=new_board.description,
+                    name=new_board.name,
+                )
+                OldBoard.objects.filter(pk=new_board.name).update(
+                    created=new_board.created, updated_on=new_board.updated_on
+                )
+        move_threads(Thread, "new_board", "board", new_board.pk, new_board.name)
+    cache.delete("boards-list-version")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('posting', '0008_board_id_slug'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_boards_to_integer_ids, copy_boards_to_name_keys),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posting', '0009_copy_boards'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='thread',
+            name='posting_thr_board_i_f85aae_idx',
+        ),
+        migrations.RemoveField(
+            model_name='thread',
+            name='board',
+        ),
+        migrations.DeleteModel(
+            name='Board',
+        ),
+        migrations.RenameModel(
+            old_name='NewBoard',
+            new_name='Board',
+        ),
+        migrations.RenameField(
+            model_name='thread',
+            old_name='new_board',
+            new_name='board',
+        ),
+        migrations.AlterField(
+            model_name='thread',
+            name='board',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='posting.Board'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['board', 'last_post_added', 'id'], name='posting_thr_board_i_f85aae_idx'),
+        ),
+    ]
@@ -1,28 +1,116 @@
 from datetime import timedelta
 
 from django.contrib.auth.models import User
-from django.db import models
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.html import linebreaks
 from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator, slugify
 
 from posting.exceptions import CannotCreateException
 
 
+BOARDS_LIST_VERSION_CACHE_KEY = "boards-list-version"
+EXCERPT_LENGTH = 220
+# Bump when render_content changes; render_posts_html re-renders older posts.
+CONTENT_HTML_VERSION = 1
+
+
+def render_content(content):
+    return linebreaks(content, autoescape=True)
+
+
+def render_excerpt(content):
+    return render_content(Truncator(content).chars(EXCERPT_LENGTH))
+
+
 class Board(models.Model):
     created = models.DateField(auto_now_add=True)
     creator = models.ForeignKey(User, on_delete=models.CASCADE)
     description = models.CharField(max_length=500, blank=True)
     updated_on = models.DateTimeField(auto_now=True)
-    name = models.CharField(max_length=100, primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+    # Kept when the board is renamed, so links to the board stay valid.
+    slug = models.SlugField(max_length=100, unique=True, allow_unicode=True)
 
     def __str__(self):
         return self.name
 
     def get_absolute_url(self):
-        return reverse("posting:board_threads_list", kwargs={"board_pk": self.pk},)
+        return reverse("posting:board_threads_list", kwargs={"board_slug": self.slug},)
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = unique_board_slug(self.name)
+        return super().save(*args, **kwargs)
+
+
+def unique_board_slug(name):
+    base_slug = slugify(name, allow_unicode=True)[:90] or "board"
+    slug = base_slug
+    suffix = 2
+    while Board.objects.filter(slug=slug).exists():
+        slug = "{}-{}".format(base_slug, suffix)
+        suffix += 1
+    return slug
+
+
+class ThreadQuerySet(models.QuerySet):
+    def rebuild_post_counts(self):
+        replies = (
+            Post.objects.filter(thread=OuterRef("pk"), starting_post=False)
+            .order_by()
+            .values("thread")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return self.update(post_count=Coalesce(Subquery(replies), 0))
+
+    def rebuild_derived_fields(self, batch_size=1000):
+        posts = Post.objects.filter(thread=OuterRef("pk")).order_by().values("thread")
+        replies = (
+            posts.filter(starting_post=False)
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        newest_post = posts.annotate(created_on=Max("created_on")).values("created_on")
+        starting_post = posts.filter(starting_post=True).values("pk")
+        self.update(
+            post_count=Coalesce(Subquery(replies), 0),
+            last_post_added=Coalesce(Subquery(newest_post), "created_on"),
+            starting_post=Subquery(starting_post),
+        )
+
+        threads = self.filter(starting_post__isnull=False).order_by("pk")
+        last_pk = 0
+        while True:
+            batch = [
+                Thread(pk=pk, excerpt=render_excerpt(content))
+                for pk, content in threads.filter(pk__gt=last_pk).values_list(
+                    "pk", "starting_post__content"
+                )[:batch_size]
+            ]
+            if not batch:
+                break
+            Thread.objects.bulk_update(batch, ["excerpt"])
+            last_pk = batch[-1].pk
 
 
 class Thread(models.Model):
@@ -33,41 +121,48 @@ class Thread(models.Model):
     updated_on = models.DateTimeField(auto_now=True)
     name = models.CharField(max_length=100)
     last_post_added = models.DateTimeField(auto_now_add=True)
+    post_count = models.PositiveIntegerField(default=0)
+    starting_post = models.OneToOneField(
+        "Post",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="started_thread",
+    )
+
+    # Rendered beginning of the starting post, shown on thread cards.
+    excerpt = models.TextField(blank=True, default="", editable=False)
+
+    objects = ThreadQuerySet.as_manager()
+
+    class Meta:
+        # Thread lists are ordered by (last_post_added, id), per board or overall.
+        indexes = [
+            models.Index(fields=["board", "last_post_added", "id"]),
+            models.Index(fields=["last_post_added", "id"]),
+        ]
 
     def __str__(self):
         return self.name
 
-    @property
-    def starting_post(self):
-        return self.post_set.filter(starting_post=True).first()
-
     @property
     def file(self):
-        if self.starting_post:
+        if self.starting_post_id:
             return self.starting_post.file
 
-    @property
-    def post_count(self):
-        return self.post_set.count() - 1
-
-    def update_most_recent_post_creation_date(self):
-        try:
-            self.last_post_added = (
-                self.post_set.all().order_by("-created_on")[0].created_on
-            )
-            self.save()
-        except IndexError:
-            return
-
     def get_absolute_url(self):
         return reverse(
-            "posting:thread", kwargs={"board_pk": self.board.pk, "pk": self.pk},
+            "posting:thread", kwargs={"board_slug": self.board.slug, "pk": self.pk},
         )
 
 
 class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField(default="")
+    content_html = models.TextField(blank=True, default="", editable=False)
+    content_html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False
+    )
     created_on = models.DateTimeField(auto_now_add=True)
     updated = models.BooleanField(default=False)
     updated_on = models.DateTimeField(auto_now=True)
@@ -90,9 +185,30 @@ class Post(models.Model):
     thread = models.ForeignKey(Thread, on_delete=models.CASCADE)
     file = models.ImageField(blank=True)
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.original_content = self.content
+    class Meta:
+        # Thread details load all posts of a thread ordered by (created_on, id).
+        indexes = [models.Index(fields=["thread", "created_on", "id"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["thread"],
+                condition=Q(starting_post=True),
+                name="posting_post_one_starting_post",
+            )
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Only content loaded anyway is kept, so deferring it stays free.
+        if "content" in field_names:
+            post._loaded_content = post.content
+        return post
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        if fields is None or "content" in fields:
+            if "content" not in self.get_deferred_fields():
+                self._loaded_content = self.content
 
     def check_plural(self, number):
         if number != 1:
@@ -128,30 +244,176 @@ class Post(models.Model):
         return "{}?{}".format(
             reverse(
                 "posting:thread",
-                kwargs={"board_pk": self.thread.board.pk, "pk": self.thread.pk},
+                kwargs={"board_slug": self.thread.board.slug, "pk": self.thread.pk},
             ),
             urlencode({"post_id": self.pk}),
         )
 
+    @property
+    def rendered_content(self):
+        if self.content_html_version == CONTENT_HTML_VERSION:
+            return mark_safe(self.content_html)
+        return mark_safe(render_content(self.content))
+
+    def render_content_html(self):
+        self.content_html = render_content(self.content)
+        self.content_html_version = CONTENT_HTML_VERSION
+
+    def saves_content(self, update_fields=None):
+        if "content" in self.get_deferred_fields():
+            return False
+        return update_fields is None or "content" in update_fields
+
+    def content_changed(self):
+        if self._state.adding or self.updated:
+            return False
+        # Content set on a post loaded without it has nothing to compare with.
+        if not hasattr(self, "_loaded_content"):
+            return True
+        return self.content != self._loaded_content
+
     def save(self, *args, **kwargs):
-        if self.original_content:
-            if not self.updated and self.content != self.original_content:
+        update_fields = kwargs.get("update_fields")
+        saves_content = self.saves_content(update_fields)
+        if saves_content:
+            if self.content_changed():
                 self.updated = True
+            self.render_content_html()
+            if update_fields is not None:
+                kwargs["update_fields"] = list(update_fields) + [
+                    "updated",
+                    "content_html",
+                    "content_html_version",
+                ]
 
-        if self.starting_post:
-            try:
-                self.thread.post_set.exclude(id=self.id).get(starting_post=True)
-            except Post.DoesNotExist:
-                pass
-            else:
-                raise CannotCreateException(
-                    "Multiple starting posts in thread {}".format(self.thread.id)
-                )
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as error:
+            if not self.starting_post:
+                raise
+            raise CannotCreateException(
+                "Multiple starting posts in thread {}".format(self.thread_id)
+            ) from error
+        if saves_content:
+            self._loaded_content = self.content
+
+
+def touch_thread(post, post_count_delta=0, **changes):
+    changes["updated_on"] = timezone.now()
+    counted = post_count_delta and not post.starting_post
+    if counted:
+        changes["post_count"] = F("post_count") + post_count_delta
+    Thread.objects.filter(pk=post.thread_id).update(**changes)
+    if Post.thread.is_cached(post):
+        post.thread.updated_on = changes["updated_on"]
+        if counted:
+            post.thread.post_count += post_count_delta
 
-        return super().save(*args, **kwargs)
+
+def excerpt_changes(post, update_fields=None):
+    if not post.starting_post or not post.saves_content(update_fields):
+        return {}
+    return {"excerpt": render_excerpt(post.content)}
 
 
 @receiver(post_save, sender=Post)
-def create_user_profile(sender, instance, created, **kwargs):
+def update_thread_after_post_save(sender, instance, created, update_fields, **kwargs):
+    changes = excerpt_changes(instance, update_fields)
+    if Post.thread.is_cached(instance) and changes:
+        instance.thread.excerpt = changes["excerpt"]
     if created:
-        instance.thread.update_most_recent_post_creation_date()
+        if instance.starting_post:
+            changes["starting_post"] = instance
+        # Greatest only moves the timestamp forward, so concurrent replies
+        # committed out of order cannot set it back.
+        touch_thread(
+            instance,
+            post_count_delta=1,
+            last_post_added=Greatest(
+                "last_post_added",
+                Value(instance.created_on, output_field=models.DateTimeField()),
+            ),
+            **changes,
+        )
+        if Post.thread.is_cached(instance):
+            instance.thread.last_post_added = max(
+                instance.thread.last_post_added, instance.created_on
+            )
+            if instance.starting_post:
+                instance.thread.starting_post = instance
+    else:
+        touch_thread(instance, **changes)
+        if instance.starting_post:
+            touch_board(thread=instance.thread_id)
+
+
+# Threads and boards being deleted. Their posts and threads are deleted first,
+# and updating rows that are about to go is wasted work.
+deleting = set()
+
+
+@receiver(pre_delete, sender=Thread)
+@receiver(pre_delete, sender=Board)
+def mark_deleting(sender, instance, **kwargs):
+    deleting.add((sender, instance.pk))
+
+
+@receiver(post_delete, sender=Post)
+def update_thread_after_post_delete(sender, instance, **kwargs):
+    if (Thread, instance.thread_id) in deleting:
+        return
+    newest_post = (
+        Post.objects.filter(thread=OuterRef("pk"))
+        .order_by()
+        .values("thread")
+        .annotate(created_on=Max("created_on"))
+        .values("created_on")
+    )
+    touch_thread(
+        instance,
+        post_count_delta=-1,
+        last_post_added=Case(
+            When(
+                last_post_added__lte=instance.created_on,
+                then=Coalesce(Subquery(newest_post), "created_on"),
+            ),
+            default=F("last_post_added"),
+        ),
+    )
+    touch_board(thread=instance.thread_id)
+
+
+# A board's thread list is validated by its newest last_post_added and by
+# Board.updated_on, which records the rarer changes that do not move it:
+# thread edits and deletions, starting post edits and deleted posts.
+def touch_board(**lookups):
+    Board.objects.filter(**lookups).update(updated_on=timezone.now())
+
+
+@receiver(post_save, sender=Thread)
+def touch_board_after_thread_save(sender, instance, created, **kwargs):
+    if not created:
+        touch_board(pk=instance.board_id)
+
+
+@receiver(post_delete, sender=Thread)
+def touch_board_after_thread_delete(sender, instance, **kwargs):
+    deleting.discard((Thread, instance.pk))
+    if (Board, instance.board_id) not in deleting:
+        touch_board(pk=instance.board_id)
+
+
+def invalidate_boards_list():
+    cache.delete(BOARDS_LIST_VERSION_CACHE_KEY)
+
+
+@receiver(post_delete, sender=Board)
+def unmark_deleted_board(sender, instance, **kwargs):
+    deleting.discard((Board, instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Board)
+def invalidate_boards_list_after_board_change(sender, **kwargs):
+    invalidate_boards_list()
+    transaction.on_commit(invalidate_boards_list)
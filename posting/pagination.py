@@ -0,0 +1,99 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodingError
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return "<Keyset page of {} objects>".format(len(self))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    def __init__(self, queryset, per_page, date_field="last_post_added"):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.date_field = date_field
+
+    def encode_cursor(self, obj):
+        value = "{}|{}".format(getattr(obj, self.date_field).isoformat(), obj.pk)
+        return urlsafe_b64encode(value.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            date, pk = urlsafe_b64decode(cursor.encode()).decode().split("|")
+            date, pk = parse_datetime(date), int(pk)
+        except (DecodingError, UnicodeDecodeError, ValueError):
+            raise Http404("Invalid cursor")
+        if date is None:
+            raise Http404("Invalid cursor")
+        return date, pk
+
+    def older_than(self, cursor):
+        date, pk = self.decode_cursor(cursor)
+        # The plain bound lets the database scan the index from the cursor on;
+        # an OR alone is not an index range.
+        return Q(**{"{}__lte".format(self.date_field): date}) & (
+            Q(**{"{}__lt".format(self.date_field): date})
+            | Q(**{self.date_field: date, "pk__lt": pk})
+        )
+
+    def newer_than(self, cursor):
+        date, pk = self.decode_cursor(cursor)
+        return Q(**{"{}__gte".format(self.date_field): date}) & (
+            Q(**{"{}__gt".format(self.date_field): date})
+            | Q(**{self.date_field: date, "pk__gt": pk})
+        )
+
+    def page_queryset(self, after=None, before=None):
+        if before:
+            return self.queryset.filter(self.newer_than(before)).order_by(
+                self.date_field, "pk"
+            )
+        queryset = self.queryset
+        if after:
+            queryset = queryset.filter(self.older_than(after))
+        return queryset.order_by("-{}".format(self.date_field), "-pk")
+
+    def page(self, after=None, before=None):
+        rows = list(self.page_queryset(after, before)[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        if before:
+            object_list = rows[: self.per_page][::-1]
+            has_newer, has_older = has_more, True
+        else:
+            object_list = rows[: self.per_page]
+            has_newer, has_older = bool(after), has_more
+
+        next_cursor = previous_cursor = None
+        if object_list and has_older:
+            next_cursor = self.encode_cursor(object_list[-1])
+        if object_list and has_newer:
+            previous_cursor = self.encode_cursor(object_list[0])
+        return KeysetPage(object_list, self, next_cursor, previous_cursor)
@@ -32,3 +32,81 @@ $(document).ready(function(){
         };
     });
 });
+
+$(document).ready(function(){
+    $('.user-search').each(function () {
+        const $container = $(this),
+              search_url = $container.attr('data-search-url'),
+              $value_input = $container.find("input[type='hidden']"),
+              $search_input = $container.find("input[type='text']"),
+              $results = $container.find('datalist');
+        let request = null;
+
+        $search_input.on('input', function () {
+            if (select_match()) {
+                return;
+            };
+            if (request) {
+                request.abort();
+            };
+            request = $.ajax({
+                method: "GET",
+                url: search_url,
+                data: {'q': $search_input.val()},
+                dataType : 'json',
+                success: show_results,
+            });
+        });
+
+        function select_match() {
+            const username = $search_input.val(),
+                  $match = $results.find('option').filter(function () {
+                      return $(this).attr('value') === username;
+                  });
+
+            $value_input.val($match.length ? $match.attr('data-id') : '');
+            return $match.length > 0;
+        };
+
+        function show_results(data) {
+            $results.empty();
+            $.each(data.results, function (index, user) {
+                $('<option>').attr('value', user.username)
+                             .attr('data-id', user.id)
+                             .appendTo($results);
+            });
+            select_match();
+        };
+    });
+});
+
+$(document).ready(function(){
+    function plural(number, unit) {
+        return number + " " + unit + (number !== 1 ? "s" : "");
+    };
+
+    function time_passed(date) {
+        const seconds = Math.max(0, Math.floor((Date.now() - date) / 1000));
+
+        if (seconds <= 60) {
+            return plural(seconds, "second");
+        } else if (seconds <= 60 * 60) {
+            return plural(Math.floor(seconds / 60), "minute");
+        } else if (seconds <= 24 * 60 * 60) {
+            return plural(Math.floor(seconds / (60 * 60)), "hour");
+        };
+        return plural(Math.floor(seconds / (24 * 60 * 60)), "day");
+    };
+
+    function update_times() {
+        $('time.time-passed').each(function () {
+            const date = new Date($(this).attr('datetime'));
+
+            $(this).attr('title', date.toLocaleString());
+            $(this).text(time_passed(date) + " ago");
+        });
+    };
+
+    update_times();
+    setInterval(update_times, 60 * 1000);
+});
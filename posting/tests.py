@@ -1,23 +1,32 @@
 import ast
 from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
-from django.test import TestCase
-from django.test.client import Client
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.client import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from freezegun import freeze_time
 
 from forum.tests import get_test_image_path
 from posting.exceptions import CannotCreateException
+from posting import views
 from posting.forms import PostForm
-from posting.models import Board, Thread, Post
+from posting.models import CONTENT_HTML_VERSION, Board, Thread, Post, deleting
+from posting.pagination import KeysetPaginator
 from users.models import Ban
 
 
 class PostingTestMixin(TestCase):
     def setUp(self):
+        cache.clear()
         self.image_path = get_test_image_path()
         self.file = open(self.image_path, "rb")
         User = get_user_model()
@@ -45,7 +54,7 @@ class PostingTestMixin(TestCase):
         self.thread_name = "test_thread"
         self.post_content = "This is test post content"
         self.board_threads_list_url = reverse(
-            "posting:board_threads_list", kwargs={"board_pk": self.board.pk},
+            "posting:board_threads_list", kwargs={"board_slug": self.board.slug},
         )
         self.observed_threads_list_url = reverse("posting:observed_threads",)
         self.banned_url = reverse("users:banned", kwargs={"user_pk": self.user.pk})
@@ -63,7 +72,8 @@ class ModelsTestCase(PostingTestMixin):
         self.assertEqual(
             thread.get_absolute_url(),
             reverse(
-                "posting:thread", kwargs={"board_pk": self.board.pk, "pk": thread.pk},
+                "posting:thread",
+                kwargs={"board_slug": self.board.slug, "pk": thread.pk},
             ),
         )
 
@@ -79,6 +89,7 @@ class ModelsTestCase(PostingTestMixin):
         )
 
         self.assertEqual(thread.starting_post, post)
+        self.assertEqual(Thread.objects.get(pk=thread.pk).starting_post, post)
 
     @freeze_time("2012-01-14 03:00:00", as_arg=True)
     def test_get_time_passed(frozen_time, self):
@@ -116,6 +127,55 @@ class ModelsTestCase(PostingTestMixin):
 
         self.assertTrue(post.updated)
 
+    def test_update_flag_with_deferred_content(self):
+        thread = Thread.objects.create(
+            author=self.user, board=self.board, name="test_thread",
+        )
+        Post.objects.create(author=self.user, content="lorem ipsum", thread=thread)
+
+        with self.assertNumQueries(1):
+            posts = list(Post.objects.defer("content"))
+        post = posts[0]
+        post.hidden = True
+        post.save(update_fields=["hidden"])
+        post.refresh_from_db()
+        self.assertFalse(post.updated)
+
+        post = Post.objects.only("pk", "updated").get(pk=post.pk)
+        post.content = "test"
+        post.save(update_fields=["content"])
+        post.refresh_from_db()
+        self.assertTrue(post.updated)
+
+    def test_update_flag_compares_loaded_content(self):
+        thread = Thread.objects.create(
+            author=self.user, board=self.board, name="test_thread",
+        )
+        post = Post.objects.create(
+            author=self.user, content="lorem ipsum", thread=thread,
+        )
+        post.hidden = True
+        post.save()
+        self.assertFalse(post.updated)
+
+        Post.objects.filter(pk=post.pk).update(content="dolor")
+        post.refresh_from_db()
+        post.save()
+        self.assertFalse(post.updated)
+
+        post = Post.objects.get(pk=post.pk)
+        post.content = "test"
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+        post_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if '"posting_post"' in query["sql"]
+        ]
+
+        self.assertEqual([sql.split()[0] for sql in post_queries], ["UPDATE"])
+        self.assertTrue(post.updated)
+
     def test_get_thread_most_recent_post(self):
         thread = Thread.objects.create(
             author=self.user, board=self.board, name="test_thread",
@@ -130,6 +190,159 @@ class ModelsTestCase(PostingTestMixin):
 
         self.assertEqual(thread.last_post_added, recent_post.created_on)
 
+    def test_last_post_added_only_moves_forward(self):
+        thread = Thread.objects.create(
+            author=self.user, board=self.board, name="test_thread",
+        )
+        recent_post = Post.objects.create(
+            author=self.user, content="lorem ipsum", thread=thread,
+        )
+
+        with freeze_time(recent_post.created_on - timedelta(minutes=5)):
+            Post.objects.create(
+                author=self.user, content="lorem ipsum", thread=thread,
+            )
+
+        thread.refresh_from_db()
+        self.assertEqual(thread.last_post_added, recent_post.created_on)
+
+    def test_last_post_added_recomputed_after_newest_post_deletion(self):
+        with freeze_time("2012-01-14 02:00:00"):
+            thread = Thread.objects.create(
+                author=self.user, board=self.board, name="test_thread",
+            )
+        with freeze_time("2012-01-14 03:00:00"):
+            previous_post = Post.objects.create(
+                author=self.user, content="lorem ipsum", thread=thread,
+            )
+        with freeze_time("2012-01-14 04:00:00"):
+            recent_post = Post.objects.create(
+                author=self.user, content="lorem ipsum", thread=thread,
+            )
+
+        previous_post.delete()
+        thread.refresh_from_db()
+        self.assertEqual(thread.last_post_added, recent_post.created_on)
+
+        with freeze_time("2012-01-14 03:30:00"):
+            previous_post = Post.objects.create(
+                author=self.user, content="lorem ipsum", thread=thread,
+            )
+        recent_post.delete()
+        thread.refresh_from_db()
+        self.assertEqual(thread.last_post_added, previous_post.created_on)
+
+        previous_post.delete()
+        thread.refresh_from_db()
+        self.assertEqual(thread.last_post_added, thread.created_on)
+
+    def test_deleting_threads_skips_post_and_thread_updates(self):
+        threads = [
+            Thread.objects.create(
+                author=self.user, board=self.board, name="test_thread",
+            )
+            for _ in range(2)
+        ]
+        for thread in threads:
+            for _ in range(3):
+                Post.objects.create(
+                    author=self.user, content="lorem ipsum", thread=thread,
+                )
+        other_post = Post.objects.create(
+            author=self.user, content="lorem ipsum", thread=threads[1],
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            threads[0].delete()
+        thread_delete_queries = [query["sql"] for query in queries.captured_queries]
+        with CaptureQueriesContext(connection) as queries:
+            self.board.delete()
+        board_delete_queries = [query["sql"] for query in queries.captured_queries]
+
+        thread_delete_updates = [
+            sql.split()[1] for sql in thread_delete_queries if sql.startswith("UPDATE")
+        ]
+        self.assertEqual(thread_delete_updates, ['"posting_board"'])
+        self.assertFalse(any(sql.startswith("UPDATE") for sql in board_delete_queries))
+        self.assertFalse(Post.objects.filter(pk=other_post.pk).exists())
+        self.assertFalse(deleting)
+
+    def test_thread_post_count(self):
+        thread = Thread.objects.create(
+            author=self.user, board=self.board, name="test_thread",
+        )
+        Post.objects.create(
+            author=self.user, content="lorem ipsum", thread=thread, starting_post=True,
+        )
+        parent = Post.objects.create(
+            author=self.user, content="lorem ipsum", thread=thread,
+        )
+        Post.objects.create(
+            author=self.user, content="lorem ipsum", thread=thread, parent=parent,
+        )
+        thread.refresh_from_db()
+
+        self.assertEqual(thread.post_count, 2)
+
+        parent.delete()
+        thread.refresh_from_db()
+
+        self.assertEqual(thread.post_count, 0)
+
+    def test_rebuild_post_counts_command(self):
+        thread = Thread.objects.create(
+            author=self.user, board=self.board, name="test_thread",
+        )
+        Post.objects.create(
+            author=self.user, content="lorem ipsum", thread=thread, starting_post=True,
+        )
+        Post.objects.create(
+            author=self.user, content="lorem ipsum", thread=thread,
+        )
+        Thread.objects.filter(pk=thread.pk).update(post_count=42)
+
+        call_command("rebuild_post_counts", stdout=StringIO())
+        thread.refresh_from_db()
+
+        self.assertEqual(thread.post_count, 1)
+
+    def test_content_html_rendered_on_save(self):
+        thread = Thread.objects.create(
+            author=self.user, board=self.board, name="test_thread",
+        )
+        post = Post.objects.create(
+            author=self.user, content="<i>lorem</i>\nipsum", thread=thread,
+        )
+
+        self.assertEqual(post.content_html, "<p>&lt;i&gt;lorem&lt;/i&gt;<br>ipsum</p>")
+        self.assertEqual(post.content_html_version, CONTENT_HTML_VERSION)
+
+        post.content = "dolor"
+        post.save(update_fields=["content"])
+        post.refresh_from_db()
+
+        self.assertEqual(post.content_html, "<p>dolor</p>")
+
+    def test_render_posts_html_command(self):
+        thread = Thread.objects.create(
+            author=self.user, board=self.board, name="test_thread",
+        )
+        post = Post.objects.create(
+            author=self.user, content="lorem ipsum", thread=thread,
+        )
+        Post.objects.update(content_html="", content_html_version=0)
+        post.refresh_from_db()
+
+        self.assertEqual(post.rendered_content, "<p>lorem ipsum</p>")
+
+        out = StringIO()
+        call_command("render_posts_html", stdout=out)
+        post.refresh_from_db()
+
+        self.assertEqual(out.getvalue(), "Rendered HTML of 1 posts.\n")
+        self.assertEqual(post.content_html, "<p>lorem ipsum</p>")
+        self.assertEqual(post.content_html_version, CONTENT_HTML_VERSION)
+
 
 class FormsTestCase(PostingTestMixin):
     def test_post_form(self):
@@ -154,13 +367,50 @@ class FormsTestCase(PostingTestMixin):
         self.assertEqual(post.thread, self.thread)
         self.assertEqual(post.refers_to, ref_post)
 
+    def test_post_form_validates_reply_targets_in_one_query(self):
+        self.thread = Thread.objects.create(
+            author=self.user, board=self.board, name=self.thread_name,
+        )
+        parent_post = Post.objects.create(author=self.user, thread=self.thread)
+        ref_post = Post.objects.create(author=self.user, thread=self.thread)
+        data = {
+            "content": self.post_content,
+            "parent": parent_post.pk,
+            "refers_to": ref_post.pk,
+        }
+
+        form = PostForm(data, thread=self.thread, author=self.user)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+
+    def test_post_form_rejects_posts_from_other_threads(self):
+        self.thread = Thread.objects.create(
+            author=self.user, board=self.board, name=self.thread_name,
+        )
+        other_thread = Thread.objects.create(
+            author=self.user, board=self.board, name=self.thread_name,
+        )
+        other_thread_post = Post.objects.create(author=self.user, thread=other_thread)
+        data = {
+            "content": self.post_content,
+            "parent": other_thread_post.pk,
+            "refers_to": other_thread_post.pk,
+        }
+
+        form = PostForm(data, thread=self.thread, author=self.user)
+
+        self.assertFalse(form.is_valid())
+        self.assertIn("parent", form.errors)
+        self.assertIn("refers_to", form.errors)
+
 
 class BoardViewsTestCase(PostingTestMixin):
     def setUp(self):
         super().setUp()
         self.create_board_url = reverse("posting:create_board")
-        self.update_board_url = reverse("posting:update_board", args=[self.board.pk])
-        self.delete_board_url = reverse("posting:delete_board", args=[self.board.pk])
+        self.update_board_url = reverse("posting:update_board", args=[self.board.slug])
+        self.delete_board_url = reverse("posting:delete_board", args=[self.board.slug])
         self.board_name = "testcreatedboard"
         self.description = "test description"
         self.board2 = Board.objects.create(creator=self.user, name="testboard2",)
@@ -181,7 +431,33 @@ class BoardViewsTestCase(PostingTestMixin):
         response = self.client.get(self.board_threads_list_url)
 
         self.assertCountEqual(list(response.context["thread_list"]), expected_threads)
-        self.assertEqual(response.context["board_pk"], self.board.pk)
+        self.assertEqual(response.context["board"], self.board)
+
+    def test_board_urls_with_board_name_redirect_to_slug(self):
+        self.client.login(username=self.user.username, password=self.password)
+        board = Board.objects.create(creator=self.user, name="Test board")
+        legacy_url = reverse(
+            "posting:board_threads_list", kwargs={"board_slug": board.name}
+        )
+
+        response = self.client.get(legacy_url, {"after": "cursor"})
+
+        self.assertEqual(board.slug, "test-board")
+        self.assertRedirects(
+            response,
+            "{}?after=cursor".format(board.get_absolute_url()),
+            status_code=HTTPStatus.MOVED_PERMANENTLY,
+            fetch_redirect_response=False,
+        )
+
+    def test_board_slug_kept_on_rename(self):
+        slug = self.board.slug
+        self.board.name = "renamed board"
+        self.board.save()
+        other_board = Board.objects.create(creator=self.user, name=slug)
+
+        self.assertEqual(self.board.slug, slug)
+        self.assertEqual(other_board.slug, "{}-2".format(slug))
 
     def test_board_threads_list_with_observed(self):
         self.client.login(username=self.user.username, password=self.password)
@@ -190,9 +466,7 @@ class BoardViewsTestCase(PostingTestMixin):
 
         response = self.client.get(self.board_threads_list_url)
 
-        self.assertListEqual(
-            list(response.context["observed_threads"]), [self.thread, self.thread3]
-        )
+        self.assertSetEqual(response.context["observed_threads"], {self.thread.pk})
 
     def test_observed_threads_list(self):
         self.client.login(username=self.user.username, password=self.password)
@@ -202,7 +476,10 @@ class BoardViewsTestCase(PostingTestMixin):
         response = self.client.get(self.observed_threads_list_url)
 
         self.assertListEqual(
-            list(response.context["object_list"]), [self.thread, self.thread3]
+            list(response.context["object_list"]), [self.thread3, self.thread]
+        )
+        self.assertSetEqual(
+            response.context["observed_threads"], {self.thread.pk, self.thread3.pk}
         )
 
     def test_create_board_with_permissions(self):
@@ -274,6 +551,240 @@ class BoardViewsTestCase(PostingTestMixin):
         self.assertEqual(board.count(), 0)
 
 
+class BoardSlugMigrationTestCase(TransactionTestCase):
+    def migrate(self, targets=None):
+        executor = MigrationExecutor(connection)
+        targets = targets or executor.loader.graph.leaf_nodes()
+        executor.migrate(targets)
+        executor.loader.build_graph()
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate()
+
+    def test_board_named_like_a_slug_keeps_its_name_url(self):
+        old_apps = self.migrate([("posting", "0007_list_indexes")])
+        creator = old_apps.get_model("auth", "User").objects.create(username="creator")
+        OldBoard = old_apps.get_model("posting", "Board")
+        OldBoard.objects.create(creator_id=creator.pk, name="General Talk")
+        OldBoard.objects.create(creator_id=creator.pk, name="general-talk")
+
+        self.migrate()
+        user = get_user_model().objects.create(username="testuser01")
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse("posting:board_threads_list", kwargs={"board_slug": "general-talk"})
+        )
+        legacy_response = self.client.get(
+            reverse("posting:board_threads_list", kwargs={"board_slug": "General Talk"})
+        )
+
+        self.assertEqual(
+            dict(Board.objects.values_list("name", "slug")),
+            {"General Talk": "general-talk-2", "general-talk": "general-talk"},
+        )
+        self.assertEqual(response.context["board"].name, "general-talk")
+        self.assertRedirects(
+            legacy_response,
+            reverse(
+                "posting:board_threads_list", kwargs={"board_slug": "general-talk-2"}
+            ),
+            status_code=HTTPStatus.MOVED_PERMANENTLY,
+        )
+
+
+class ThreadListQueriesTestCase(PostingTestMixin):
+    def setUp(self):
+        super().setUp()
+        self.overboard_url = reverse("posting:overboard")
+        self.client.login(username=self.user.username, password=self.password)
+
+    def create_threads(self, quantity):
+        for index in range(quantity):
+            author = self.user if index % 2 else self.user2
+            thread = Thread.objects.create(
+                author=author, board=self.board, name=self.thread_name,
+            )
+            Post.objects.create(
+                author=author,
+                thread=thread,
+                content=self.post_content,
+                starting_post=True,
+            )
+            Post.objects.create(author=self.user, thread=thread)
+            self.user.userprofile.observed_threads.add(thread)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(queries), len(response.context["object_list"])
+
+    def assert_constant_queries(self, url):
+        self.client.get(url)
+        self.create_threads(1)
+        single_queries, single_threads = self.count_queries(url)
+        self.create_threads(9)
+        page_queries, page_threads = self.count_queries(url)
+
+        self.assertEqual(single_threads, 1)
+        self.assertEqual(page_threads, 10)
+        self.assertEqual(single_queries, page_queries)
+
+    def test_overboard_queries(self):
+        self.assert_constant_queries(self.overboard_url)
+
+    def test_board_threads_list_queries(self):
+        self.assert_constant_queries(self.board_threads_list_url)
+
+    def test_observed_threads_list_queries(self):
+        self.assert_constant_queries(self.observed_threads_list_url)
+
+    def test_thread_list_shows_excerpt_without_loading_post_content(self):
+        self.create_threads(1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.overboard_url)
+
+        self.assertContains(response, "<p>{}</p>".format(self.post_content))
+        for query in queries.captured_queries:
+            self.assertNotRegex(query["sql"], r'"posting_post"\."content(_html)?"')
+
+
+class ThreadExcerptTestCase(PostingTestMixin):
+    def test_excerpt_follows_starting_post(self):
+        thread = Thread.objects.create(
+            author=self.user, board=self.board, name=self.thread_name,
+        )
+        post = Post.objects.create(
+            author=self.user,
+            thread=thread,
+            content="<b>{}</b>\n\n{}".format("a" * 10, "b" * 300),
+            starting_post=True,
+        )
+        Post.objects.create(author=self.user, thread=thread, content="reply")
+
+        thread.refresh_from_db()
+        self.assertEqual(
+            thread.excerpt,
+            "<p>&lt;b&gt;{}&lt;/b&gt;</p>\n\n<p>{}…</p>".format("a" * 10, "b" * 200),
+        )
+
+        post.content = "edited"
+        post.save()
+        thread.refresh_from_db()
+        self.assertEqual(thread.excerpt, "<p>edited</p>")
+
+
+class QueryPlanTestCase(PostingTestMixin):
+    def setUp(self):
+        super().setUp()
+        other_board = Board.objects.create(name="other board", creator=self.user)
+        for index in range(30):
+            thread = Thread.objects.create(
+                author=self.user,
+                board=self.board if index % 3 else other_board,
+                name=self.thread_name,
+            )
+            Post.objects.create(
+                author=self.user, thread=thread, starting_post=True,
+            )
+            for _ in range(3):
+                Post.objects.create(author=self.user2, thread=thread)
+        self.thread = thread
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assert_uses_indexes(self, queryset, bounded_by=None):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+            self.assertNotIn("Seq Scan", plan)
+            self.assertNotRegex(plan, r"\bSort\b")
+            if bounded_by:
+                self.assertRegex(plan, r"Index Cond: .*{} [<>]".format(bounded_by))
+            return
+
+        plan = queryset.explain()
+        self.assertNotIn("USE TEMP B-TREE", plan)
+        for line in plan.splitlines():
+            if "SCAN" in line:
+                self.assertIn("USING", line, plan)
+        if bounded_by:
+            self.assertRegex(plan, r"\b{}[<>]".format(bounded_by))
+
+    def test_thread_lists_use_indexes(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        self.user.userprofile.observed_threads.add(*Thread.objects.all()[:20])
+        overboard = views.OverboardView(request=request)
+        board_threads = views.BoardThreadsListView(
+            request=request, kwargs={"board_slug": self.board.slug}
+        )
+        observed_threads = views.ObservedThreadsListView(request=request)
+
+        for view in [overboard, board_threads, observed_threads]:
+            paginator = KeysetPaginator(view.get_queryset(), view.paginate_by)
+            cursor = paginator.encode_cursor(self.thread)
+            self.assert_uses_indexes(
+                paginator.page_queryset()[: view.paginate_by + 1]
+            )
+            for queryset in [
+                paginator.page_queryset(after=cursor),
+                paginator.page_queryset(before=cursor),
+            ]:
+                self.assert_uses_indexes(
+                    queryset[: view.paginate_by + 1], bounded_by="last_post_added"
+                )
+
+    def test_thread_posts_use_indexes(self):
+        view = views.ThreadDetailView()
+        view.object = self.thread
+
+        self.assert_uses_indexes(view.get_posts())
+
+
+class KeysetPaginationTestCase(PostingTestMixin):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username=self.user.username, password=self.password)
+        self.threads = [
+            Thread.objects.create(
+                author=self.user, board=self.board, name=self.thread_name,
+            )
+            for _ in range(15)
+        ]
+        self.threads.reverse()
+
+    def test_pages_follow_cursors(self):
+        first_page = self.client.get(self.board_threads_list_url).context["page_obj"]
+        second_page = self.client.get(
+            self.board_threads_list_url, {"after": first_page.next_cursor}
+        ).context["page_obj"]
+        previous_page = self.client.get(
+            self.board_threads_list_url, {"before": second_page.previous_cursor}
+        ).context["page_obj"]
+
+        self.assertListEqual(list(first_page), self.threads[:10])
+        self.assertFalse(first_page.has_previous())
+        self.assertListEqual(list(second_page), self.threads[10:])
+        self.assertFalse(second_page.has_next())
+        self.assertListEqual(list(previous_page), self.threads[:10])
+
+    def test_does_not_count_threads(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("posting:overboard"))
+
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.board_threads_list_url, {"after": "invalid"})
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
 class PostViewsTestCase(PostingTestMixin):
     def setUp(self):
         super().setUp()
@@ -281,18 +792,19 @@ class PostViewsTestCase(PostingTestMixin):
             author=self.user, board=self.board, name=self.thread_name,
         )
         self.thread_details_url = reverse(
-            "posting:thread", kwargs={"board_pk": self.board.pk, "pk": self.thread.pk},
+            "posting:thread",
+            kwargs={"board_slug": self.board.slug, "pk": self.thread.pk},
         )
         self.create_url = reverse(
             "posting:create_post",
-            kwargs={"board_pk": self.board.pk, "thread_pk": self.thread.pk},
+            kwargs={"board_slug": self.board.slug, "thread_pk": self.thread.pk},
         )
         self.post = Post.objects.create(author=self.user, thread=self.thread,)
         self.post2 = Post.objects.create(author=self.user, thread=self.thread,)
         self.update_post_url = reverse(
             "posting:update_post",
             kwargs={
-                "board_pk": self.board.pk,
+                "board_slug": self.board.slug,
                 "thread_pk": self.thread.pk,
                 "pk": self.post.pk,
             },
@@ -300,7 +812,7 @@ class PostViewsTestCase(PostingTestMixin):
         self.delete_post_url = reverse(
             "posting:delete_post",
             kwargs={
-                "board_pk": self.board.pk,
+                "board_slug": self.board.slug,
                 "thread_pk": self.thread.pk,
                 "pk": self.post.pk,
             },
@@ -316,12 +828,46 @@ class PostViewsTestCase(PostingTestMixin):
             self.create_url, {"parent": self.post.id}
         )
 
+        refers_to_form = response_refers_to_post.context["form"]
+        parent_form = response_with_parent.context["form"]
+
+        self.assertEqual(refers_to_form["refers_to"].value(), str(self.post.id))
+        self.assertEqual(parent_form["parent"].value(), str(self.post.id))
+
+    def test_create_post_form_prefilled_with_reply_targets(self):
+        self.client.login(username=self.user.username, password=self.password)
+
+        response = self.client.get(
+            self.create_url, {"parent": self.post.id, "refers_to": self.post2.id}
+        )
+
+        self.assertNotContains(response, "<select")
+        self.assertContains(
+            response,
+            '<input type="hidden" name="parent" value="{}"'.format(self.post.id),
+        )
+        self.assertContains(
+            response,
+            '<input type="hidden" name="refers_to" value="{}"'.format(self.post2.id),
+        )
+
+    def test_create_post_writes(self):
+        self.client.login(username=self.user.username, password=self.password)
+        post_count = Thread.objects.get(pk=self.thread.pk).post_count
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.create_url, {"content": self.post_content})
+        writes = [
+            query["sql"].replace("INTO ", "").split()[:2]
+            for query in queries.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+
         self.assertEqual(
-            ast.literal_eval(response_refers_to_post.context.get("refers_to")),
-            self.post.id,
+            writes, [["INSERT", '"posting_post"'], ["UPDATE", '"posting_thread"']]
         )
         self.assertEqual(
-            ast.literal_eval(response_with_parent.context.get("parent")), self.post.id,
+            Thread.objects.get(pk=self.thread.pk).post_count, post_count + 1
         )
 
     def test_create_post(self):
@@ -360,7 +906,7 @@ class PostViewsTestCase(PostingTestMixin):
         post_quantity = Post.objects.all().count()
         non_existing_thread_url = reverse(
             "posting:create_post",
-            kwargs={"board_pk": self.board.pk, "thread_pk": 2137},
+            kwargs={"board_slug": self.board.slug, "thread_pk": 2137},
         )
 
         response = self.client.post(
@@ -458,18 +1004,19 @@ class ThreadViewsTestCase(PostingTestMixin):
             author=self.user, board=self.board, name="test_thread_2",
         )
         self.create_thread_url = reverse(
-            "posting:create_thread", kwargs={"board_pk": self.board.pk},
+            "posting:create_thread", kwargs={"board_slug": self.board.slug},
         )
         self.thread_details_url = reverse(
-            "posting:thread", kwargs={"board_pk": self.board.pk, "pk": self.thread1.pk},
+            "posting:thread",
+            kwargs={"board_slug": self.board.slug, "pk": self.thread1.pk},
         )
         self.update_thread_url = reverse(
             "posting:update_thread",
-            kwargs={"board_pk": self.board.pk, "pk": self.thread1.pk},
+            kwargs={"board_slug": self.board.slug, "pk": self.thread1.pk},
         )
         self.delete_thread_url = reverse(
             "posting:delete_thread",
-            kwargs={"board_pk": self.board.pk, "pk": self.thread1.pk},
+            kwargs={"board_slug": self.board.slug, "pk": self.thread1.pk},
         )
         self.updated_content = "This is updated content"
 
@@ -517,6 +1064,47 @@ class ThreadViewsTestCase(PostingTestMixin):
         # tearDown
         starting_post.file.storage.delete(starting_post.file.name)
 
+    def test_create_thread_writes(self):
+        self.client.login(username=self.user.username, password=self.password)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                self.create_thread_url,
+                {"name": self.thread_name, "content": self.post_content},
+            )
+        writes = [
+            query["sql"].split()[0]
+            for query in queries.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        thread = Thread.objects.get(name=self.thread_name)
+
+        self.assertEqual(writes, ["INSERT", "INSERT", "UPDATE"])
+        self.assertEqual(thread.starting_post.content, self.post_content)
+        self.assertEqual(thread.last_post_added, thread.starting_post.created_on)
+        self.assertEqual(thread.post_count, 0)
+
+    def test_create_thread_with_invalid_post_creates_nothing(self):
+        self.client.login(username=self.user.username, password=self.password)
+        thread_count = Thread.objects.count()
+        post_count = Post.objects.count()
+        invalid_file = StringIO("not an image")
+        invalid_file.name = "image.png"
+
+        response = self.client.post(
+            self.create_thread_url,
+            {
+                "name": self.thread_name,
+                "content": self.post_content,
+                "file": invalid_file,
+            },
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context["post_form"].errors)
+        self.assertEqual(Thread.objects.count(), thread_count)
+        self.assertEqual(Post.objects.count(), post_count)
+
     def test_banned_user_cannot_add_new_thread(self):
         self.client.login(username=self.user.username, password=self.password)
         Ban.objects.create(user=self.user, duration=timedelta(days=3), reason="test")
@@ -553,6 +1141,20 @@ class ThreadViewsTestCase(PostingTestMixin):
         self.assertIn(post_2_in_thread, posts)
         self.assertNotIn(post_out_of_thread, posts)
 
+    def test_thread_details_render_machine_readable_timestamps(self):
+        with freeze_time("2012-01-14 03:00:00"):
+            post = Post.objects.create(
+                author=self.user, thread=self.thread1, content=self.post_content,
+            )
+        self.client.login(username=self.user.username, password=self.password)
+
+        response = self.client.get(self.thread_details_url)
+
+        self.assertContains(
+            response, '<time class="time-passed" datetime="2012-01-14T03:00:00+00:00">'
+        )
+        self.assertNotContains(response, post.time_passed_since_creation)
+
     def test_thread_details_with_parent_child(self):
         starting_post = Post.objects.create(
             author=self.user,
@@ -592,6 +1194,170 @@ class ThreadViewsTestCase(PostingTestMixin):
         self.assertEqual(starting_post, response.context.get("starting_post"))
         self.assertNotIn(starting_post, posts)
 
+    def test_thread_details_queries(self):
+        self.client.login(username=self.user.username, password=self.password)
+        Post.objects.create(
+            author=self.user,
+            thread=self.thread1,
+            content=self.post_content,
+            starting_post=True,
+        )
+
+        def create_replies(quantity):
+            for index in range(quantity):
+                author = self.user if index % 2 else self.user2
+                parent = Post.objects.create(
+                    author=author, thread=self.thread1, content=self.post_content,
+                )
+                Post.objects.create(
+                    author=self.moderator,
+                    thread=self.thread1,
+                    content=self.post_content,
+                    parent=parent,
+                    refers_to=parent,
+                )
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.thread_details_url)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            return len(queries)
+
+        self.client.get(self.thread_details_url)
+        create_replies(1)
+        small_thread_queries = count_queries()
+        create_replies(20)
+
+        self.assertEqual(small_thread_queries, count_queries())
+
+    def test_thread_details_cached_until_thread_changes(self):
+        post = Post.objects.create(
+            author=self.user, thread=self.thread1, content=self.post_content,
+        )
+        self.client.login(username=self.user.username, password=self.password)
+
+        self.client.get(self.thread_details_url)
+        with CaptureQueriesContext(connection) as queries:
+            cached_response = self.client.get(self.thread_details_url)
+        cached_queries = [query["sql"] for query in queries.captured_queries]
+        post.content = self.updated_content
+        post.save()
+        updated_response = self.client.get(self.thread_details_url)
+
+        self.assertTrue(cached_queries)
+        self.assertFalse(any("posting_post" in sql for sql in cached_queries))
+        self.assertContains(cached_response, self.post_content)
+        self.assertContains(updated_response, self.updated_content)
+
+    def test_thread_details_controls_rendered_per_user(self):
+        post = Post.objects.create(
+            author=self.user, thread=self.thread1, content=self.post_content,
+        )
+        update_post_url = reverse(
+            "posting:update_post",
+            kwargs={
+                "board_slug": self.board.slug,
+                "thread_pk": self.thread1.pk,
+                "pk": post.pk,
+            },
+        )
+
+        self.client.login(username=self.user.username, password=self.password)
+        author_response = self.client.get(self.thread_details_url)
+        self.client.login(username=self.user2.username, password=self.password)
+        other_user_response = self.client.get(self.thread_details_url)
+        self.client.login(username=self.moderator.username, password=self.password)
+        moderator_response = self.client.get(self.thread_details_url)
+
+        self.assertContains(author_response, update_post_url)
+        self.assertContains(author_response, self.update_thread_url)
+        self.assertNotContains(other_user_response, update_post_url)
+        self.assertNotContains(other_user_response, self.update_thread_url)
+        self.assertContains(moderator_response, update_post_url)
+        self.assertContains(moderator_response, self.update_thread_url)
+
+    def test_thread_details_conditional_get(self):
+        self.client.login(username=self.user.username, password=self.password)
+
+        response = self.client.get(self.thread_details_url)
+        not_modified_response = self.client.get(
+            self.thread_details_url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        Post.objects.create(
+            author=self.user2, thread=self.thread1, content=self.post_content,
+        )
+        modified_response = self.client.get(
+            self.thread_details_url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(not_modified_response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(modified_response.status_code, HTTPStatus.OK)
+
+    def test_board_threads_list_conditional_get(self):
+        self.client.login(username=self.user.username, password=self.password)
+
+        response = self.client.get(self.board_threads_list_url)
+        not_modified_response = self.client.get(
+            self.board_threads_list_url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.user.userprofile.observed_threads.add(self.thread1)
+        observed_response = self.client.get(
+            self.board_threads_list_url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.thread2.delete()
+        deleted_response = self.client.get(
+            self.board_threads_list_url,
+            HTTP_IF_NONE_MATCH=observed_response["ETag"],
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(not_modified_response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(observed_response.status_code, HTTPStatus.OK)
+        self.assertEqual(deleted_response.status_code, HTTPStatus.OK)
+
+    def test_board_threads_list_not_modified_without_scanning_threads(self):
+        starting_post = Post.objects.create(
+            author=self.user,
+            thread=self.thread1,
+            content=self.post_content,
+            starting_post=True,
+        )
+        self.client.login(username=self.user.username, password=self.password)
+        response = self.client.get(self.board_threads_list_url)
+
+        with CaptureQueriesContext(connection) as queries:
+            not_modified_response = self.client.get(
+                self.board_threads_list_url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        validation_queries = [query["sql"] for query in queries.captured_queries]
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(
+                author=self.user2, thread=self.thread1, content=self.post_content,
+            )
+        reply_queries = [query["sql"] for query in queries.captured_queries]
+        replied_response = self.client.get(
+            self.board_threads_list_url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        starting_post.content = self.updated_content
+        starting_post.save()
+        edited_response = self.client.get(
+            self.board_threads_list_url,
+            HTTP_IF_NONE_MATCH=replied_response["ETag"],
+        )
+
+        self.assertEqual(not_modified_response.status_code, HTTPStatus.NOT_MODIFIED)
+        thread_queries = [sql for sql in validation_queries if "posting_thread" in sql]
+        self.assertEqual(len(thread_queries), 1)
+        self.assertIn(
+            'SELECT MAX("posting_thread"."last_post_added")', thread_queries[0]
+        )
+        self.assertFalse(any("posting_post" in sql for sql in validation_queries))
+        self.assertFalse(any("posting_board" in sql for sql in reply_queries))
+        self.assertEqual(replied_response.status_code, HTTPStatus.OK)
+        self.assertEqual(edited_response.status_code, HTTPStatus.OK)
+
     def test_get_update_thread_corect_data(self):
         post = Post.objects.create(
             author=self.user,
@@ -682,3 +1448,43 @@ class ThreadViewsTestCase(PostingTestMixin):
         response = self.client.delete(self.delete_thread_url)
 
         self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+
+class AdminTestCase(PostingTestMixin):
+    def setUp(self):
+        super().setUp()
+        self.superuser = get_user_model().objects.create_superuser(
+            username="superuser", email="", password=self.password
+        )
+        self.thread = Thread.objects.create(
+            author=self.user, board=self.board, name=self.thread_name,
+        )
+        self.post = Post.objects.create(
+            author=self.user, thread=self.thread, starting_post=True
+        )
+        Post.objects.create(
+            author=self.user, thread=self.thread, parent=self.post, refers_to=self.post
+        )
+        self.client.login(username=self.superuser.username, password=self.password)
+
+    def test_admin_pages_do_not_render_full_table_selects(self):
+        urls = [
+            reverse("admin:posting_thread_changelist"),
+            reverse("admin:posting_thread_change", args=[self.thread.pk]),
+            reverse("admin:posting_post_changelist"),
+            "{}?thread__id__exact={}".format(
+                reverse("admin:posting_post_changelist"), self.thread.pk
+            ),
+            reverse("admin:posting_post_change", args=[self.post.pk]),
+            reverse("admin:users_ban_changelist"),
+            reverse("admin:users_ban_add"),
+            reverse("admin:users_userprofile_change", args=[self.user.userprofile.pk]),
+        ]
+
+        for url in urls:
+            response = self.client.get(url)
+
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            for field in ["thread", "parent", "refers_to", "starting_post"]:
+                self.assertNotContains(response, '<select name="{}"'.format(field))
+            self.assertNotContains(response, '<select name="observed_threads"')
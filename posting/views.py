@@ -1,17 +1,28 @@
+import re
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
 from django.http import (
+    Http404,
     HttpResponseNotFound,
     HttpResponseForbidden,
 )
-from django.shortcuts import redirect
+from django.shortcuts import get_object_or_404, redirect
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
 from django.views.generic import DetailView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.views.generic.list import ListView
 from django.urls import reverse_lazy, reverse
 
-from forum.views import BaseViewMixin
+from forum.views import BaseViewMixin, ConditionalGetViewMixin
 from posting.forms import PostForm
 from posting.models import Board, Thread, Post
+from posting.pagination import KeysetPaginator
 
 
 class CrudPermissionViewMixin(BaseViewMixin, PermissionRequiredMixin):
@@ -35,42 +46,125 @@ class UpdatePermissionViewAuthorMixin(BannedUserPostMixin):
         return HttpResponseForbidden()
 
 
+class BoardViewMixin:
+    def get_board(self):
+        if not hasattr(self, "board"):
+            board_slug = self.kwargs.get("board_slug")
+            # Before boards had slugs, their URLs used the board name.
+            boards = Board.objects.filter(Q(slug=board_slug) | Q(name=board_slug))
+            self.board = min(
+                boards, key=lambda board: board.slug != board_slug, default=None
+            )
+        return self.board
+
+    def get_object(self, queryset=None):
+        board = self.get_board()
+        if board is None:
+            raise Http404("Board not found")
+        return board
+
+    def get(self, request, *args, **kwargs):
+        board = self.get_object()
+        if board.slug != kwargs["board_slug"]:
+            kwargs["board_slug"] = board.slug
+            url = reverse(request.resolver_match.view_name, kwargs=kwargs)
+            if request.GET:
+                url = "{}?{}".format(url, request.GET.urlencode())
+            return redirect(url, permanent=True)
+        return super().get(request, *args, **kwargs)
+
+
+def thread_list_queryset(threads):
+    return (
+        threads.select_related("author", "starting_post")
+        .defer("starting_post__content", "starting_post__content_html")
+        .prefetch_related("board")
+    )
+
+
 class ThreadListViewMixin(BaseViewMixin, ListView):
     paginate_by = 10
-    ordering = ["-last_post_added"]
+    ordering = ["-last_post_added", "-pk"]
+    keyset_pagination = False
+
+    def get_threads(self):
+        return Thread.objects.all()
+
+    def get_queryset(self):
+        return thread_list_queryset(self.get_threads()).order_by(*self.get_ordering())
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.keyset_pagination:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size)
+        page = paginator.page(
+            after=self.request.GET.get("after"), before=self.request.GET.get("before"),
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["board_pk"] = self.kwargs.get("board_pk")
-        context[
-            "observed_threads"
-        ] = self.request.user.userprofile.observed_threads.all()
+        context["keyset_pagination"] = self.keyset_pagination
+        context["observed_threads"] = self.get_observed_thread_ids(
+            context["object_list"]
+        )
         return context
 
+    def get_observed_thread_ids(self, threads):
+        userprofile = self.request.user.userprofile
+        observed_threads = userprofile.observed_threads.through.objects.filter(
+            userprofile=userprofile, thread__in=[thread.pk for thread in threads]
+        )
+        return set(observed_threads.values_list("thread_id", flat=True))
+
 
 class ObservedThreadsListView(ThreadListViewMixin):
     template_name = "posting/overboard.html"
+    keyset_pagination = True
 
-    def get_queryset(self):
-        return self.request.user.userprofile.observed_threads.all()
+    def get_threads(self):
+        # Walking the thread list index and probing the user's observations
+        # avoids sorting all observed threads for every page.
+        observations = Thread.userprofile_set.through.objects.filter(
+            userprofile=self.request.user.userprofile, thread=OuterRef("pk")
+        )
+        return Thread.objects.filter(Exists(observations))
+
+    def get_observed_thread_ids(self, threads):
+        return {thread.pk for thread in threads}
 
 
 class OverboardView(ThreadListViewMixin):
-    model = Thread
     template_name = "posting/overboard.html"
+    keyset_pagination = True
 
 
-class BoardThreadsListView(ThreadListViewMixin):
+class BoardThreadsListView(
+    BoardViewMixin, ConditionalGetViewMixin, ThreadListViewMixin
+):
     template_name = "posting/board_threads_list.html"
+    keyset_pagination = True
 
-    def get_queryset(self):
-        return Thread.objects.filter(board=self.kwargs.get("board_pk")).order_by(
-            "-last_post_added"
-        )
+    def get_threads(self):
+        return Thread.objects.filter(board=self.get_board())
+
+    def get_validators(self):
+        board = self.get_board()
+        if board is None:
+            return None, None
+
+        last_post_added = Thread.objects.filter(board=board).aggregate(
+            last_post_added=Max("last_post_added")
+        )["last_post_added"]
+        observed_on = self.request.user.userprofile.observed_threads_updated_on
+        dates = [board.updated_on, last_post_added, observed_on]
+        last_modified = max(date for date in dates if date)
+        return (board.pk, *dates), last_modified
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["board"] = Board.objects.get(pk=context["board_pk"])
+        context["board"] = self.get_board()
         return context
 
 
@@ -84,90 +178,164 @@ class CreateBoardView(CrudPermissionViewMixin, CreateView):
         return super().form_valid(form)
 
 
-class UpdateBoardView(CrudPermissionViewMixin, UpdateView):
+class UpdateBoardView(CrudPermissionViewMixin, BoardViewMixin, UpdateView):
     fields = ["name", "description"]
     model = Board
     permission_required = "posting.change_board"
 
 
-class DeleteBoardView(CrudPermissionViewMixin, DeleteView):
+class DeleteBoardView(CrudPermissionViewMixin, BoardViewMixin, DeleteView):
     model = Board
     permission_required = "posting.delete_board"
     success_url = reverse_lazy("posting:overboard")
 
 
-class CreateThreadView(BannedUserPostMixin, CreateView):
+class CreateThreadView(BoardViewMixin, BannedUserPostMixin, CreateView):
     model = Thread
     fields = ["name"]
 
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["post_form"] = PostForm()
-        return context
+        kwargs.setdefault("post_form", PostForm())
+        return super().get_context_data(**kwargs)
 
     def form_valid(self, form):
-        try:
-            board = Board.objects.get(pk=self.kwargs.get("board_pk"))
-        except Board.DoesNotExist:
+        board = self.get_board()
+        if board is None:
             return HttpResponseNotFound("<h4>Board not found</h4>")
         author = self.request.user
+        post_form = PostForm(self.request.POST, self.request.FILES, author=author)
+        if not post_form.is_valid():
+            return self.render_to_response(
+                self.get_context_data(form=form, post_form=post_form)
+            )
+
         form.instance.board = board
         form.instance.author = author
-        thread = form.save()
-        post_form = PostForm(
-            self.request.POST, self.request.FILES, thread=thread, author=author,
-        )
-        post_form.instance.starting_post = True
-        post_form.save()
+        with transaction.atomic():
+            thread = form.save()
+            post_form.thread = thread
+            post_form.instance.starting_post = True
+            post_form.save()
         return redirect(thread)
 
 
-class ThreadDetailView(BaseViewMixin, DetailView):
-    model = Thread
+def build_post_tree(posts):
+    starting_post = None
+    tree = {}
+    loaded_posts = {}
+    roots = {}
+
+    for post in posts:
+        loaded_posts[post.pk] = post
+        if post.refers_to_id in loaded_posts:
+            post.refers_to = loaded_posts[post.refers_to_id]
+
+        if post.starting_post:
+            starting_post = post
+        elif post.parent_id is None:
+            tree[post] = []
+            roots[post.pk] = post
+        elif post.parent_id in roots:
+            post.parent = loaded_posts[post.parent_id]
+            roots[post.pk] = roots[post.parent_id]
+            tree[roots[post.pk]].append(post)
+
+    return starting_post, tree
+
+
+class ThreadDetailView(BaseViewMixin, ConditionalGetViewMixin, DetailView):
+    queryset = Thread.objects.select_related("author__userprofile", "board")
+    controls_pattern = re.compile(r"<!--(post|thread)-controls:(\d+):(\d+)-->")
+
+    def get_validators(self):
+        thread = (
+            Thread.objects.filter(pk=self.kwargs.get("pk"))
+            .values_list("pk", "updated_on", "last_post_added")
+            .first()
+        )
+        if thread is None:
+            return None, None
+        return thread, max(thread[1:])
+
+    def get_cache_key(self):
+        return "thread-body:{}:{}:{}".format(
+            self.object.pk,
+            self.object.updated_on.timestamp(),
+            self.object.last_post_added.timestamp(),
+        )
+
+    def get_posts(self):
+        return (
+            Post.objects.filter(thread=self.object)
+            .select_related("author__userprofile")
+            .order_by("created_on", "pk")
+        )
+
+    def render_controls(self, template, match):
+        kind, pk, author_pk = match.group(1), int(match.group(2)), int(match.group(3))
+        user = self.request.user
+        is_author = author_pk == user.pk
+        can_edit = is_author or user.has_perm("posting.change_{}".format(kind))
+        can_delete = is_author or user.has_perm("posting.delete_{}".format(kind))
+        if not can_edit and not can_delete:
+            return ""
+
+        board_slug = self.object.board.slug
+        if kind == "thread":
+            kwargs = {"board_slug": board_slug, "pk": pk}
+        else:
+            kwargs = {"board_slug": board_slug, "thread_pk": self.object.pk, "pk": pk}
+        return template.render(
+            {
+                "can_edit": can_edit,
+                "can_delete": can_delete,
+                "edit_url": reverse("posting:update_{}".format(kind), kwargs=kwargs),
+                "delete_url": reverse("posting:delete_{}".format(kind), kwargs=kwargs),
+            }
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        posts = Post.objects.filter(thread=self.kwargs.get("pk"))
-        context["board_pk"] = self.kwargs.get("board_pk")
-        context["posts"] = {}
-        try:
-            context["starting_post"] = posts.get(
-                thread=self.kwargs.get("pk"), starting_post=True
-            )
-        except Post.DoesNotExist:
-            context["starting_post"] = None
-        parentless_posts = (
-            posts.filter(
-                thread=self.kwargs.get("pk"), starting_post=False, parent=None,
+        context["board_slug"] = self.kwargs.get("board_slug")
+
+        cache_key = self.get_cache_key()
+        thread_body = cache.get(cache_key)
+        if thread_body is None:
+            context["starting_post"], context["posts"] = build_post_tree(
+                self.get_posts()
             )
-            .order_by("created_on")
-            .prefetch_related("children")
+            thread_body = render_to_string("posting/_thread_body.html", context)
+            cache.set(cache_key, thread_body, settings.THREAD_BODY_CACHE_TIMEOUT)
+
+        render_controls = partial(
+            self.render_controls, get_template("posting/_controls.html")
+        )
+        context["thread_body"] = mark_safe(
+            self.controls_pattern.sub(render_controls, thread_body)
         )
-        for post in parentless_posts:
-            context["posts"][post] = [child for child in post.children.all()]
         return context
 
 
 class UpdateThreadView(UpdatePermissionViewAuthorMixin, UpdateView):
-    model = Thread
+    queryset = Thread.objects.select_related("starting_post__author")
     fields = ["name"]
     permission = "posting.change_thread"
     template_name = "posting/edit_thread_form.html"
 
     def get_context_data(self, **kwargs):
-        thread = self.get_object()
         context = super().get_context_data(**kwargs)
 
-        context["post_form"] = PostForm(instance=thread.starting_post)
+        context["post_form"] = PostForm(instance=self.object.starting_post)
         return context
 
     def post(self, request, **kwargs):
         thread = self.get_object()
+        starting_post = thread.starting_post
         post_form = PostForm(
             self.request.POST,
             thread=thread,
-            author=thread.starting_post.author,
-            instance=thread.starting_post,
+            author=starting_post.author,
+            instance=starting_post,
         )
         post_form.save()
         return super().post(request, **kwargs)
@@ -180,31 +348,32 @@ class DeleteThreadView(UpdatePermissionViewAuthorMixin, DeleteView):
 
     def dispatch(self, request, **kwargs):
         self.success_url = reverse_lazy(
-            "posting:board_threads_list", kwargs={"board_pk": kwargs.get("board_pk")},
+            "posting:board_threads_list",
+            kwargs={"board_slug": kwargs.get("board_slug")},
         )
         return super().dispatch(request, **kwargs)
 
 
 class CreatePostView(BannedUserPostMixin, CreateView):
     model = Post
-    fields = ["content", "parent", "refers_to", "file"]
-
-    def form_valid(self, form):
-        thread_pk = self.kwargs.get("thread_pk")
-        try:
-            form.instance.thread = Thread.objects.get(id=thread_pk)
-        except Thread.DoesNotExist:
-            return HttpResponseNotFound("<h4>Thread not found</h4>")
+    form_class = PostForm
 
-        form.instance.author = self.request.user
+    def get_thread(self):
+        if not hasattr(self, "thread"):
+            self.thread = get_object_or_404(Thread, pk=self.kwargs.get("thread_pk"))
+        return self.thread
 
-        return super().form_valid(form)
+    def get_initial(self):
+        initial = super().get_initial()
+        initial["parent"] = self.request.GET.get("parent")
+        initial["refers_to"] = self.request.GET.get("refers_to")
+        return initial
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["refers_to"] = self.request.GET.get("refers_to")
-        context["parent"] = self.request.GET.get("parent")
-        return context
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["thread"] = self.get_thread()
+        kwargs["author"] = self.request.user
+        return kwargs
 
 
 class UpdatePostView(UpdatePermissionViewAuthorMixin, UpdateView):
@@ -223,6 +392,6 @@ class DeletePostView(UpdatePermissionViewAuthorMixin, DeleteView):
         thread_pk = self.get_object().thread.pk
         self.success_url = reverse_lazy(
             "posting:thread",
-            kwargs={"board_pk": kwargs.get("board_pk"), "pk": thread_pk},
+            kwargs={"board_slug": kwargs.get("board_slug"), "pk": thread_pk},
         )
         return super().dispatch(request, **kwargs)
@@ -1,7 +1,42 @@
 from django.contrib import admin
+from django.utils import timezone
 
 from users.models import UserProfile, Ban
 
 
-admin.site.register(UserProfile)
-admin.site.register(Ban)
+class ActiveBanListFilter(admin.SimpleListFilter):
+    title = "status"
+    parameter_name = "status"
+
+    def lookups(self, request, model_admin):
+        return [("active", "Active"), ("expired", "Expired")]
+
+    def queryset(self, request, queryset):
+        if self.value() == "active":
+            return queryset.filter(expires_at__gt=timezone.now())
+        if self.value() == "expired":
+            return queryset.filter(expires_at__lte=timezone.now())
+        return queryset
+
+
+class UserProfileAdmin(admin.ModelAdmin):
+    list_display = ["user"]
+    list_select_related = ["user"]
+    autocomplete_fields = ["user"]
+    raw_id_fields = ["observed_threads"]
+    search_fields = ["^user__username"]
+    show_full_result_count = False
+
+
+class BanAdmin(admin.ModelAdmin):
+    list_display = ["user", "reason", "created", "expires_at"]
+    list_select_related = ["user"]
+    list_filter = [ActiveBanListFilter]
+    autocomplete_fields = ["user"]
+    readonly_fields = ["created", "expires_at"]
+    search_fields = ["^user__username"]
+    show_full_result_count = False
+
+
+admin.site.register(UserProfile, UserProfileAdmin)
+admin.site.register(Ban, BanAdmin)
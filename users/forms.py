@@ -4,6 +4,7 @@ from django.contrib.auth.models import User
 from durationwidget.widgets import TimeDurationWidget
 
 from users.models import Ban
+from users.widgets import UserSearchWidget
 
 
 class ExtendedUserCreationForm(UserCreationForm):
@@ -22,3 +23,4 @@ class CustomBanForm(forms.ModelForm):
     class Meta:
         model = Ban
         fields = ["user", "reason", "duration"]
+        widgets = {"user": UserSearchWidget}
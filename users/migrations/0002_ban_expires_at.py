@@ -0,0 +1,38 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F
+
+
+def populate_expires_at(apps, schema_editor):
+    Ban = apps.get_model("users", "Ban")
+    Ban.objects.update(
+        expires_at=ExpressionWrapper(
+            F("created") + F("duration"), output_field=models.DateTimeField()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ban',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_expires_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ban',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='ban',
+            index=models.Index(fields=['user', 'expires_at'], name='users_ban_user_id_0b09c3_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_ban_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='observed_threads_updated_on',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
@@ -1,7 +1,8 @@
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils import timezone
@@ -13,13 +14,25 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     observed_threads = models.ManyToManyField(Thread, blank=True)
     avatar = models.ImageField(blank=True)
+    observed_threads_updated_on = models.DateTimeField(null=True, editable=False)
 
     @property
     def is_banned(self):
-        active_bans = [ban for ban in self.user.ban_set.all() if ban.is_active]
-        if active_bans:
-            return True
-        return False
+        cache_key = active_ban_cache_key(self.user_id)
+        expires_at = cache.get(cache_key)
+        if expires_at is None:
+            now = timezone.now()
+            expires_at = (
+                Ban.objects.filter(user_id=self.user_id, expires_at__gt=now)
+                .order_by("-expires_at")
+                .values_list("expires_at", flat=True)
+                .first()
+            )
+            if expires_at:
+                cache.set(cache_key, expires_at, (expires_at - now).total_seconds())
+            else:
+                cache.set(cache_key, False, settings.NOT_BANNED_CACHE_TIMEOUT)
+        return bool(expires_at) and expires_at > timezone.now()
 
     @property
     def avatar_url(self):
@@ -37,20 +50,50 @@ class Ban(models.Model):
     reason = models.CharField(max_length=150)
     created = models.DateTimeField(auto_now_add=True)
     duration = models.DurationField()
+    expires_at = models.DateTimeField(db_index=True, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "expires_at"])]
 
     @property
     def is_active(self):
-        return (self.created + self.duration) > timezone.now()
+        return self.expires_at > timezone.now()
 
     @property
     def time_left(self):
-        time_left = (self.created + self.duration) - timezone.now()
+        time_left = self.expires_at - timezone.now()
         hours, remainder = divmod(int(time_left.total_seconds()), 3600)
         minutes, seconds = divmod(remainder, 60)
         return "{} hours {} minutes and {} seconds left".format(hours, minutes, seconds)
 
+    def save(self, *args, **kwargs):
+        self.expires_at = (self.created or timezone.now()) + self.duration
+        return super().save(*args, **kwargs)
+
+
+def active_ban_cache_key(user_id):
+    return "active-ban:{}".format(user_id)
+
+
+@receiver([post_save, post_delete], sender=Ban)
+def invalidate_active_ban_cache(sender, instance, **kwargs):
+    cache.delete(active_ban_cache_key(instance.user_id))
+
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
+
+
+@receiver(m2m_changed, sender=UserProfile.observed_threads.through)
+def touch_observed_threads(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        profiles = UserProfile.objects.filter(observed_threads=instance)
+    elif reverse and action in ("post_add", "post_remove"):
+        profiles = UserProfile.objects.filter(pk__in=pk_set)
+    elif not reverse and action in ("post_add", "post_remove", "post_clear"):
+        profiles = UserProfile.objects.filter(pk=instance.pk)
+    else:
+        return
+    profiles.update(observed_threads_updated_on=timezone.now())
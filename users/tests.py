@@ -4,9 +4,11 @@ from http import HTTPStatus
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from django.test import TestCase
 from django.test.client import Client
 from django.urls import reverse
+from django.utils import timezone
 from freezegun import freeze_time
 
 from forum.tests import get_test_image_path
@@ -16,6 +18,7 @@ from users.models import Ban
 
 class ViewsTestsMixin(TestCase):
     def setUp(self):
+        cache.clear()
         User = get_user_model()
         self.client = Client()
         self.user = User.objects.create(username="testuser01")
@@ -64,6 +67,43 @@ class UserProfileModelTestCase(ViewsTestsMixin):
             self.assertTrue(self.user.userprofile.is_banned)
         self.assertFalse(self.user.userprofile.is_banned)
 
+    def test_is_banned_cached_until_bans_change(self):
+        userprofile = self.user.userprofile
+        self.assertFalse(userprofile.is_banned)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(userprofile.is_banned)
+
+        ban = Ban.objects.create(
+            user=self.user, duration=timedelta(days=3), reason="test"
+        )
+        self.assertTrue(userprofile.is_banned)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(userprofile.is_banned)
+
+        ban.delete()
+        self.assertFalse(userprofile.is_banned)
+
+    def test_not_banned_cache_expires(self):
+        with freeze_time("2012-01-14 03:00:00") as frozen_time:
+            userprofile = self.user.userprofile
+            self.assertFalse(userprofile.is_banned)
+            Ban.objects.bulk_create(
+                [
+                    Ban(
+                        user=self.user,
+                        duration=timedelta(days=3),
+                        reason="test",
+                        expires_at=timezone.now() + timedelta(days=3),
+                    )
+                ]
+            )
+
+            self.assertFalse(userprofile.is_banned)
+            frozen_time.tick(timedelta(seconds=settings.NOT_BANNED_CACHE_TIMEOUT + 1))
+            self.assertTrue(userprofile.is_banned)
+
 
 class BanModelTestCase(ViewsTestsMixin):
     def test_ban_end_date(self):
@@ -137,6 +177,66 @@ class BanCRUDTestCase(ViewsTestsMixin):
         self.assertEqual(ban.duration, self.test_duration)
         self.assertEqual(ban.reason, self.test_reason)
 
+    def test_create_ban_form_preselects_user_without_listing_users(self):
+        self.client.login(username=self.moderator.username, password=self.password)
+
+        response = self.client.get(self.create_ban_url, {"user_pk": self.user.pk})
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'name="user" value="{}"'.format(self.user.pk))
+        self.assertContains(response, 'value="{}"'.format(self.user.username))
+        self.assertNotContains(response, self.moderator.username)
+        self.assertNotContains(response, "<option")
+
+    def test_create_ban_form_ignores_invalid_user(self):
+        self.client.login(username=self.moderator.username, password=self.password)
+
+        response = self.client.get(self.create_ban_url, {"user_pk": "abc"})
+        invalid_post_response = self.client.post(
+            self.create_ban_url,
+            {
+                "user": "abc",
+                "duration_0": self.test_duration_days,
+                "duration_1": self.test_duration_hours,
+                "reason": self.test_reason,
+            },
+        )
+
+        for response in [response, invalid_post_response]:
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertContains(response, '<input type="hidden" name="user">')
+        self.assertFalse(Ban.objects.exists())
+
+    def test_user_search(self):
+        User = get_user_model()
+        for number in range(25):
+            User.objects.create(username="search{:02}".format(number))
+        self.client.login(username=self.moderator.username, password=self.password)
+        url = reverse("users:user_search")
+
+        first_page = self.client.get(url, {"q": "search"}).json()
+        second_page = self.client.get(
+            url, {"q": "search", "after": first_page["next"]}
+        ).json()
+
+        self.assertEqual(
+            [user["username"] for user in first_page["results"]],
+            ["search{:02}".format(number) for number in range(20)],
+        )
+        self.assertEqual(first_page["next"], "search19")
+        self.assertEqual(
+            [user["username"] for user in second_page["results"]],
+            ["search{:02}".format(number) for number in range(20, 25)],
+        )
+        self.assertIsNone(second_page["next"])
+
+    def test_regular_user_cant_search_users(self):
+        self.client.login(username=self.user.username, password=self.password)
+
+        response = self.client.get(reverse("users:user_search"), {"q": "test"})
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
     def test_regular_user_cant_create_ban(self):
         self.client.login(username=self.user.username, password=self.password)
 
@@ -174,6 +274,33 @@ class BanCRUDTestCase(ViewsTestsMixin):
             response.context["object_list"], [active_ban, active_ban_2]
         )
 
+    def test_ban_list_filters_bans_by_status(self):
+        self.client.login(username=self.moderator.username, password=self.password)
+        with freeze_time("2012-01-14 03:00:00"):
+            expired_ban = Ban.objects.create(
+                user=self.user, duration=timedelta(days=3), reason="test"
+            )
+        active_ban = Ban.objects.create(
+            user=self.user, duration=timedelta(days=30), reason="test"
+        )
+        expiring_ban = Ban.objects.create(
+            user=self.user, duration=timedelta(hours=3), reason="test"
+        )
+
+        active_response = self.client.get(self.ban_list_url)
+        expired_response = self.client.get(self.ban_list_url, {"status": "expired"})
+        expiring_response = self.client.get(reverse("users:expiring_ban_list"))
+
+        self.assertListEqual(
+            list(active_response.context["object_list"]), [expiring_ban, active_ban]
+        )
+        self.assertListEqual(
+            list(expired_response.context["object_list"]), [expired_ban]
+        )
+        self.assertListEqual(
+            list(expiring_response.context["object_list"]), [expiring_ban]
+        )
+
     def test_create_view_initial_values(self):
         self.client.login(username=self.moderator.username, password=self.password)
 
@@ -202,6 +329,26 @@ class BanCRUDTestCase(ViewsTestsMixin):
         self.assertEqual(response.status_code, HTTPStatus.FOUND)
         self.assertEqual(ban.reason, new_reason)
 
+    def test_moving_ban_to_other_user_unbans_previous_user(self):
+        self.client.login(username=self.moderator.username, password=self.password)
+        ban = Ban.objects.create(
+            user=self.user, duration=timedelta(days=3), reason="test"
+        )
+        self.assertTrue(self.user.userprofile.is_banned)
+
+        self.client.post(
+            reverse("users:update_ban", args=[ban.pk]),
+            {
+                "user": self.moderator.pk,
+                "duration_0": self.test_duration_days,
+                "duration_1": self.test_duration_hours,
+                "reason": self.test_reason,
+            },
+        )
+
+        self.assertFalse(self.user.userprofile.is_banned)
+        self.assertTrue(self.moderator.userprofile.is_banned)
+
     def test_moderator_can_delete_ban(self):
         self.client.login(username=self.moderator.username, password=self.password)
         ban = Ban.objects.create(
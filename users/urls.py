@@ -55,7 +55,11 @@ urlpatterns = [
     path("user/<pk>/edit", views.UserProfileUpdateView.as_view(), name="edit_profile"),
     path("banned/<int:user_pk>", views.UserBannedView.as_view(), name="banned"),
     path("ban/", views.BanListView.as_view(), name="ban_list"),
+    path(
+        "ban/expiring", views.ExpiringBanListView.as_view(), name="expiring_ban_list"
+    ),
     path("ban/<pk>/update", views.UpdateBanView.as_view(), name="update_ban"),
     path("ban/<pk>/delete", views.DeleteBanView.as_view(), name="delete_ban"),
     path("ban/create", views.CreateBanView.as_view(), name="create_ban"),
+    path("ban/users", views.UserSearchView.as_view(), name="user_search"),
 ]
@@ -1,5 +1,10 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.core.cache import cache
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.views.generic import View, TemplateView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.views.generic.detail import DetailView
@@ -9,7 +14,7 @@ from django.http import HttpResponseForbidden, JsonResponse
 from forum.views import BaseViewMixin
 from posting.models import Thread
 from users.forms import CustomBanForm, ExtendedUserCreationForm
-from users.models import Ban, UserProfile
+from users.models import Ban, UserProfile, active_ban_cache_key
 
 
 class SignupView(CreateView):
@@ -61,16 +66,42 @@ class UserProfileUpdateView(BaseViewMixin, UpdateView):
 
 
 class BanListView(BaseViewMixin, PermissionRequiredMixin, ListView):
-    model = Ban
+    paginate_by = 20
     permission_required = "users.view_ban"
 
+    def get_status(self):
+        if self.request.GET.get("status") == "expired":
+            return "expired"
+        return "active"
+
+    def get_queryset(self):
+        bans = Ban.objects.select_related("user")
+        now = timezone.now()
+        if self.get_status() == "expired":
+            return bans.filter(expires_at__lte=now).order_by("-expires_at", "-pk")
+        return bans.filter(expires_at__gt=now).order_by("-created", "-pk")
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        object_list = context.get("object_list")
-        context["object_list"] = [item for item in object_list if item.is_active]
+        context["status"] = self.get_status()
         return context
 
 
+class ExpiringBanListView(BanListView):
+    expiring_within = timedelta(days=1)
+
+    def get_status(self):
+        return "expiring"
+
+    def get_queryset(self):
+        now = timezone.now()
+        return (
+            Ban.objects.select_related("user")
+            .filter(expires_at__gt=now, expires_at__lte=now + self.expiring_within)
+            .order_by("expires_at", "pk")
+        )
+
+
 class CreateBanView(BaseViewMixin, PermissionRequiredMixin, CreateView):
     model = Ban
     form_class = CustomBanForm
@@ -84,12 +115,44 @@ class CreateBanView(BaseViewMixin, PermissionRequiredMixin, CreateView):
         return initial
 
 
+class UserSearchView(BaseViewMixin, PermissionRequiredMixin, View):
+    paginate_by = 20
+
+    def has_permission(self):
+        user = self.request.user
+        return user.has_perm("users.add_ban") or user.has_perm("users.change_ban")
+
+    def get(self, request):
+        # Case-sensitive prefix lookups and keyset pagination on username both
+        # use the unique username index.
+        users = get_user_model().objects.filter(
+            username__startswith=request.GET.get("q", "")
+        )
+        after = request.GET.get("after")
+        if after:
+            users = users.filter(username__gt=after)
+        users = list(
+            users.order_by("username").values("id", "username")[: self.paginate_by + 1]
+        )
+        results = users[: self.paginate_by]
+        next_cursor = None
+        if len(users) > self.paginate_by:
+            next_cursor = results[-1]["username"]
+
+        return JsonResponse({"results": results, "next": next_cursor})
+
+
 class UpdateBanView(BaseViewMixin, PermissionRequiredMixin, UpdateView):
     model = Ban
     form_class = CustomBanForm
     permission_required = "users.change_ban"
     success_url = reverse_lazy("users:ban_list",)
 
+    def form_valid(self, form):
+        if "user" in form.changed_data:
+            cache.delete(active_ban_cache_key(form.initial["user"]))
+        return super().form_valid(form)
+
 
 class DeleteBanView(BaseViewMixin, PermissionRequiredMixin, DeleteView):
     model = Ban
@@ -108,13 +171,12 @@ class UserBannedView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user_bans = self.request.user.ban_set.all()
-        active_bans = [ban for ban in user_bans if ban.is_active]
-        active_bans.sort(key=lambda x: x.created, reverse=True)
-
-        try:
-            context["most_recent_ban"] = active_bans[0]
-        except IndexError:
-            pass
+        most_recent_ban = (
+            self.request.user.ban_set.filter(expires_at__gt=timezone.now())
+            .order_by("-created")
+            .first()
+        )
+        if most_recent_ban:
+            context["most_recent_ban"] = most_recent_ban
 
         return context
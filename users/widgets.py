@@ -0,0 +1,25 @@
+from django import forms
+from django.contrib.auth import get_user_model
+from django.urls import reverse_lazy
+
+
+class UserSearchWidget(forms.Widget):
+    template_name = "users/widgets/user_search.html"
+    search_url = reverse_lazy("users:user_search")
+
+    def get_context(self, name, value, attrs):
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            value = None
+        context = super().get_context(name, value, attrs)
+        username = ""
+        if value is not None:
+            username = (
+                get_user_model()
+                .objects.filter(pk=value)
+                .values_list("username", flat=True)
+                .first()
+            ) or ""
+        context["widget"].update({"username": username, "search_url": self.search_url})
+        return context